@@ -3,9 +3,13 @@ from flask import Flask
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy.engine import make_url
 from config import Config
+from app.utils.serialization import OrjsonProvider
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 # 初始化扩展
 db = SQLAlchemy()
@@ -22,6 +26,7 @@ def create_app(config_name=None):
         Flask应用实例
     """
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     
     # 配置应用
     if config_name is None:
@@ -40,36 +45,58 @@ def create_app(config_name=None):
     else:
         from config import Config
         app.config.from_object(Config)
-    
+
+    # 批量插入时按页合并为多VALUES语句，psycopg2下启用批量执行模式
+    engine_options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    engine_options.setdefault('insertmanyvalues_page_size', 1000)
+    database_url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if database_url.get_driver_name() == 'psycopg2':
+        engine_options.setdefault('executemany_mode', 'values_plus_batch')
+    if database_url.get_backend_name() == 'sqlite' and \
+            database_url.database in (None, '', ':memory:'):
+        # 内存SQLite使用StaticPool，不支持连接池容量参数
+        engine_options.pop('pool_size', None)
+        engine_options.pop('max_overflow', None)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
+
     # 配置日志
-    # 确保日志目录存在
-    if not os.path.exists('logs'):
-        os.mkdir('logs')
+    # 处理器只挂在根日志器上，app.logger通过传播输出，避免重复写入；
+    # 重复调用create_app（测试、重载）时不再重复注册
+    root_logger = logging.getLogger()
+    if not any(isinstance(h, QueueHandler) for h in root_logger.handlers):
+        # 确保日志目录存在
+        if not os.path.exists('logs'):
+            os.mkdir('logs')
 
-    # 创建文件日志处理器 - 增加文件大小和备份数量
-    file_handler = RotatingFileHandler('logs/app.log', maxBytes=10485760, backupCount=20)  # 10MB一个文件，最多20个备份
-    file_handler.setFormatter(logging.Formatter(
-        '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-    ))
-    file_handler.setLevel(logging.DEBUG)  # 改为DEBUG级别记录更多日志
-    
-    # 添加控制台日志处理器，方便调试
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(logging.Formatter(
-        '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-    ))
-    console_handler.setLevel(logging.DEBUG)
+        # 创建文件日志处理器 - 增加文件大小和备份数量
+        file_handler = RotatingFileHandler('logs/app.log', maxBytes=10485760, backupCount=20)  # 10MB一个文件，最多20个备份
+        file_handler.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
+        ))
+        file_handler.setLevel(logging.DEBUG)  # 改为DEBUG级别记录更多日志
 
-    # 添加到应用和根日志器
-    app.logger.addHandler(file_handler)
-    app.logger.addHandler(console_handler)
-    app.logger.setLevel(logging.DEBUG)  # 改为DEBUG级别
+        # 添加控制台日志处理器，方便调试
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
+        ))
+        console_handler.setLevel(logging.DEBUG)
 
-    # 配置根日志器，确保所有模块的日志都能被捕获
-    root_logger = logging.getLogger()
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
-    root_logger.setLevel(logging.DEBUG)  # 改为DEBUG级别
+        # 文件和控制台写入交给后台线程，请求线程只做入队
+        log_queue = queue.Queue(-1)
+        listener = QueueListener(
+            log_queue, file_handler, console_handler, respect_handler_level=True
+        )
+        listener.start()
+        atexit.register(listener.stop)
+
+        # 配置根日志器，确保所有模块的日志都能被捕获
+        root_logger.addHandler(QueueHandler(log_queue))
+
+    # 日志级别由配置决定，生产环境默认INFO
+    log_level = app.config.get('LOG_LEVEL', 'INFO')
+    root_logger.setLevel(log_level)
+    app.logger.setLevel(log_level)
 
     app.logger.info('应用启动')
     
@@ -77,6 +104,12 @@ def create_app(config_name=None):
     db.init_app(app)
     migrate.init_app(app, db)
     CORS(app)
+
+    # 后台检测任务线程池
+    from app.services.detection_jobs import DetectionJobManager
+    app.extensions['detection_jobs'] = DetectionJobManager(
+        max_workers=app.config.get('DETECTION_WORKERS', 4)
+    )
     
     # 注册蓝图
     from app.api import bp as api_bp
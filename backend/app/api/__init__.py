@@ -1,5 +1,6 @@
 from flask import Blueprint
 from flask_restx import Api
+from app.utils.serialization import output_json
 
 bp = Blueprint('api', __name__)
 api = Api(bp,
@@ -7,5 +8,6 @@ api = Api(bp,
     version='1.0',
     description='组合逻辑电路竞争与冒险检测系统API'
 )
+api.representations['application/json'] = output_json
 
 from app.api import routes 
\ No newline at end of file
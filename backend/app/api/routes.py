@@ -1,13 +1,24 @@
-from flask_restx import Resource, fields
+from flask import Response, current_app, request
+from flask_restx import Resource, fields, inputs, reqparse
+from app import db
 from app.api import api
 from app.services.parser import CircuitParser
 from app.services.detector import HazardDetector
 from app.models.circuit import Circuit
 from app.utils.exceptions import CircuitParseError, ValidationError
+from app.utils.serialization import (
+    CircuitOut, GateOut, InputPort, OutputPort, ParseResponse, msgspec_response
+)
 from app.dal.circuit_dal import CircuitDAL
+from collections import defaultdict
 from datetime import datetime
+from typing import Dict, Optional
+from werkzeug.http import quote_etag
+import fastjsonschema
 import logging
 
+logger = logging.getLogger(__name__)
+
 # API模型定义
 parse_request = api.model('ParseRequest', {
     'expression': fields.String(required=True, description='逻辑表达式(如 "A AND B OR C")')
@@ -34,6 +45,90 @@ hazard_result_model = api.model('HazardResult', {
     'hazards': fields.List(fields.Raw(description='冒险列表'))
 })
 
+# 检测请求的JSON Schema，导入时编译为校验函数，避免每次请求解释schema
+detect_request_schema = {
+    "type": "object",
+    "required": ["circuit"],
+    "properties": {
+        "circuit": {
+            "type": "object",
+            "required": ["name", "gates", "inputs", "outputs", "connections"],
+            "properties": {
+                "name": {"type": "string"},
+                "gates": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "required": ["id", "type", "delay"],
+                        "properties": {
+                            "id": {"type": "string"},
+                            "type": {"type": "string"},
+                            "delay": {"type": "number"},
+                            "inputs": {"type": "array", "items": {"type": "string"}},
+                            "output": {"type": "string"}
+                        }
+                    }
+                },
+                "inputs": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "required": ["id", "name", "initial_value"]
+                    }
+                },
+                "outputs": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "required": ["id", "name", "source"]
+                    }
+                },
+                "connections": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "required": ["from", "to", "delay"],
+                        "properties": {
+                            "from": {"type": "string"},
+                            "to": {"type": "string"},
+                            "delay": {"type": "number"}
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+validate_detect_request = fastjsonschema.compile(detect_request_schema)
+
+simulation_request = api.model('SimulationRequest', {
+    'circuit_id': fields.Integer(description='电路ID', required=False),
+    'circuit': fields.Nested(circuit_model, required=False),
+    'inputs': fields.Raw(description='输入值映射 {input_id: value}', required=True)
+})
+
+detection_job_model = api.model('DetectionJob', {
+    'job_id': fields.String(description='任务ID'),
+    'status': fields.String(description='任务状态(pending/running/success/failed)'),
+    'results': fields.Nested(hazard_result_model, description='检测结果(仅成功时)'),
+    'error': fields.String(description='错误信息(仅失败时)')
+})
+
+# 电路列表分页参数
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+circuit_list_args = reqparse.RequestParser()
+circuit_list_args.add_argument(
+    'cursor', type=inputs.natural, location='args',
+    help='上一页返回的next_cursor'
+)
+circuit_list_args.add_argument(
+    'per_page', type=inputs.int_range(1, MAX_PER_PAGE),
+    default=DEFAULT_PER_PAGE, location='args',
+    help=f'每页数量(1-{MAX_PER_PAGE})'
+)
+
 @api.route('/')
 class Index(Resource):
     def get(self):
@@ -62,66 +157,105 @@ class CircuitParserAPI(Resource):
             circuit_model = parser.parse(data['expression'])
             
             # 保存到数据库
+            circuit_name = f"Circuit_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             circuit = CircuitDAL.create_circuit(
-                name=f"Circuit_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                name=circuit_name,
                 expression=data['expression']
             )
+            # flush时主键已随INSERT返回，提交前取出，避免提交后过期重新查询
+            circuit_id = circuit.id
             
-            # 保存门
-            for gate in circuit_model.gates.values():
-                CircuitDAL.add_gate(
-                    circuit=circuit,
-                    gate_id=gate.id,
-                    gate_type=gate.type,
-                    delay=gate.delay
-                )
+            # 批量保存门和连接
+            CircuitDAL.bulk_add_gates(circuit, circuit_model.gates.values())
+            CircuitDAL.bulk_add_connections(circuit, circuit_model.connections)
             
-            # 保存连接
-            for conn in circuit_model.connections:
-                CircuitDAL.add_connection(
-                    circuit=circuit,
-                    from_id=conn['from'],
-                    to_id=conn['to'],
-                    delay=conn['delay']
-                )
+            # 整个解析请求只提交一次
+            db.session.commit()
             
-            return {
-                "status": "success",
-                "circuit": {
-                    "id": circuit.id,
-                    "name": circuit.name,
-                    "expression": circuit.expression,
-                    "inputs": {
-                        input_id: {
-                            "name": input_data["name"],
-                            "initial_value": input_data["initial_value"]
-                        }
-                        for input_id, input_data in circuit_model.inputs.items()
-                    },
-                    "outputs": {
-                        output_id: {
-                            "name": output_data["name"],
-                            "source": output_data["source"]
-                        }
-                        for output_id, output_data in circuit_model.outputs.items()
-                    },
-                    "gates": [
-                        {
-                            "id": g.gate_id,
-                            "type": g.type,
-                            "delay": g.delay
-                        }
-                        for g in circuit.gates
-                    ],
-                    "connections": circuit_model.connections
-                }
-            }
+            # 直接由内存中的电路模型构造响应结构体，避免重新查询刚插入的门
+            payload = ParseResponse(status="success", circuit=CircuitOut(
+                id=circuit_id,
+                name=circuit_name,
+                expression=data['expression'],
+                inputs={
+                    input_id: InputPort(input_data["name"], input_data["initial_value"])
+                    for input_id, input_data in circuit_model.inputs.items()
+                },
+                outputs={
+                    output_id: OutputPort(output_data["name"], output_data["source"])
+                    for output_id, output_data in circuit_model.outputs.items()
+                },
+                gates=[GateOut(g.id, g.type, g.delay) for g in circuit_model.gates.values()],
+                connections=circuit_model.connections
+            ))
+            return msgspec_response(payload)
             
         except (CircuitParseError, ValidationError) as e:
+            db.session.rollback()
             api.abort(400, str(e))
         except Exception as e:
+            db.session.rollback()
             api.abort(500, "服务器内部错误")
 
+def _load_detection_circuit(data: Dict) -> Circuit:
+    """
+    校验检测请求数据并构建电路实例
+    
+    Args:
+        data: 请求数据
+        
+    Returns:
+        Circuit实例
+        
+    Raises:
+        ValidationError: 请求数据缺失或格式错误
+    """
+    if not isinstance(data, dict) or 'circuit' not in data:
+        logger.error("请求数据缺少circuit字段")
+        raise ValidationError("缺少电路数据")
+    
+    # 先按schema校验，保证circuit是对象后再读取其字段
+    try:
+        validate_detect_request(data)
+    except fastjsonschema.JsonSchemaException as e:
+        logger.error("电路数据校验失败: %s", e.message)
+        raise ValidationError(f"电路数据格式错误: {e.message}")
+    
+    logger.info("接收到检测请求: %s", data['circuit'].get('name', '未命名'))
+    
+    # 记录接收到的数据结构
+    logger.debug("接收到的电路数据: %s", data)
+    
+    # 预处理电路数据，确保每个门都有inputs和output字段
+    circuit_data = data['circuit']
+    if 'gates' in circuit_data and 'connections' in circuit_data:
+        # 一次遍历建立 目标 -> 来源列表 的索引，避免逐门扫描全部连接
+        sources_by_target = defaultdict(list)
+        for conn in circuit_data['connections']:
+            sources_by_target[conn['to']].append(conn['from'])
+        
+        for gate in circuit_data['gates']:
+            # 如果门缺少inputs字段，从connections中推断
+            if 'inputs' not in gate:
+                gate['inputs'] = list(sources_by_target.get(gate['id'], ()))
+                logger.info("为门 %s 推断inputs: %s", gate['id'], gate['inputs'])
+            
+            # 如果门缺少output字段，假设与门ID相同
+            if 'output' not in gate:
+                # 输出端口需修改，并不是真正的经计算过后的输出端口
+                gate['output'] = gate['id']
+                logger.info("为门 %s 设置默认output: %s", gate['id'], gate['output'])
+    
+    try:
+        circuit = Circuit.from_dict(data)
+        logger.info("电路解析成功: %s, 包含 %d 个门", circuit.name, len(circuit.gates))
+    except Exception as e:
+        logger.error("电路解析失败: %s", e)
+        logger.error("电路数据: %s", data)
+        raise ValidationError(f"电路数据格式错误: {str(e)}")
+    
+    return circuit
+
 @api.route('/detect')
 class HazardDetection(Resource):
     """竞争冒险检测API"""
@@ -131,54 +265,17 @@ class HazardDetection(Resource):
     @api.response(400, '检测错误')
     def post(self):
         """检测电路中的竞争和冒险"""
-        logger = logging.getLogger(__name__)
-        
         try:
-            data = api.payload
-            logger.info(f"接收到检测请求: {data.get('circuit', {}).get('name', '未命名')}")
-            
-            if not data or 'circuit' not in data:
-                logger.error("请求数据缺少circuit字段")
-                raise ValidationError("缺少电路数据")
-            
-            # 记录接收到的数据结构
-            logger.debug(f"接收到的电路数据: {data}")
-            
-            # 预处理电路数据，确保每个门都有inputs和output字段
-            circuit_data = data['circuit']
-            if 'gates' in circuit_data and 'connections' in circuit_data:
-                for gate in circuit_data['gates']:
-                    # 如果门缺少inputs字段，从connections中推断
-                    if 'inputs' not in gate:
-                        gate['inputs'] = []
-                        for conn in circuit_data['connections']:
-                            if conn['to'] == gate['id']:
-                                gate['inputs'].append(conn['from'])
-                        logger.info(f"为门 {gate['id']} 推断inputs: {gate['inputs']}")
-                    
-                    # 如果门缺少output字段，假设与门ID相同
-                    if 'output' not in gate:
-                        # 输出端口需修改，并不是真正的经计算过后的输出端口
-                        gate['output'] = gate['id']
-                        logger.info(f"为门 {gate['id']} 设置默认output: {gate['output']}")
+            circuit = _load_detection_circuit(api.payload)
             
             try:
-                circuit = Circuit.from_dict(data)
-                logger.info(f"电路解析成功: {circuit.name}, 包含 {len(circuit.gates)} 个门")
-            except Exception as e:
-                logger.error(f"电路解析失败: {str(e)}")
-                logger.error(f"电路数据: {data}")
-                raise ValidationError(f"电路数据格式错误: {str(e)}")
-            
-            try:
-                detector = HazardDetector(circuit)
+                detector = HazardDetector.for_circuit(circuit)
                 logger.info("开始检测电路中的竞争和冒险")
                 results = detector.detect_hazards()
-                logger.info(f"检测完成: 发现 {len(results['race_conditions'])} 个竞争条件, {len(results['hazards'])} 个冒险")
+                logger.info("检测完成: 发现 %d 个竞争条件, %d 个冒险",
+                            len(results['race_conditions']), len(results['hazards']))
             except Exception as e:
-                logger.error(f"检测过程出错: {str(e)}")
-                import traceback
-                logger.error(traceback.format_exc())
+                logger.exception("检测过程出错: %s", e)
                 raise Exception(f"检测过程出错: {str(e)}")
             
             return {
@@ -187,32 +284,61 @@ class HazardDetection(Resource):
             }
             
         except ValidationError as e:
-            logger.error(f"验证错误: {str(e)}")
+            logger.error("验证错误: %s", e)
             api.abort(400, str(e))
         except Exception as e:
-            logger.error(f"服务器内部错误: {str(e)}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception("服务器内部错误: %s", e)
             api.abort(500, f"服务器内部错误: {str(e)}")
 
+@api.route('/detect/jobs')
+class DetectionJobList(Resource):
+    """后台竞争冒险检测任务API"""
+    
+    @api.expect(circuit_model)
+    @api.response(202, '任务已提交')
+    @api.response(400, '检测错误')
+    @api.response(503, '检测任务过多')
+    def post(self):
+        """提交后台检测任务，检测在工作线程中执行"""
+        try:
+            circuit = _load_detection_circuit(api.payload)
+            job_id = current_app.extensions['detection_jobs'].submit(circuit)
+        except ValidationError as e:
+            logger.error("验证错误: %s", e)
+            api.abort(400, str(e))
+        except Exception as e:
+            logger.exception("服务器内部错误: %s", e)
+            api.abort(500, f"服务器内部错误: {str(e)}")
+        
+        if job_id is None:
+            api.abort(503, "检测任务过多，请稍后再试")
+        return {"status": "accepted", "job_id": job_id}, 202
+
+@api.route('/detect/jobs/<string:job_id>')
+class DetectionJobDetail(Resource):
+    """后台检测任务状态API"""
+    
+    @api.response(200, '获取成功', detection_job_model)
+    @api.response(404, '任务不存在')
+    def get(self, job_id):
+        """查询后台检测任务的状态和结果"""
+        job = current_app.extensions['detection_jobs'].get(job_id)
+        if job is None:
+            api.abort(404, "任务不存在")
+        return job
+
 @api.route('/simulate')
 class CircuitSimulation(Resource):
     """电路仿真API"""
     
-    @api.expect(api.model('SimulationRequest', {
-        'circuit_id': fields.Integer(description='电路ID', required=False),
-        'circuit': fields.Nested(circuit_model, required=False),
-        'inputs': fields.Raw(description='输入值映射 {input_id: value}', required=True)
-    }))
+    @api.expect(simulation_request)
     @api.response(200, '仿真成功')
     @api.response(400, '仿真错误')
     def post(self):
         """仿真电路，计算输出值，并生成逻辑表达式"""
-        logger = logging.getLogger(__name__)
-        
         try:
             data = api.payload
-            logger.info(f"接收到仿真请求")
+            logger.info("接收到仿真请求")
             
             if not data or 'inputs' not in data:
                 logger.error("请求数据缺少inputs字段")
@@ -236,7 +362,7 @@ class CircuitSimulation(Resource):
                 try:
                     circuit = Circuit.from_dict(data)
                 except Exception as e:
-                    logger.error(f"电路解析失败: {str(e)}")
+                    logger.error("电路解析失败: %s", e)
                     raise ValidationError(f"电路数据格式错误: {str(e)}")
             else:
                 raise ValidationError("请提供circuit_id或circuit")
@@ -249,7 +375,7 @@ class CircuitSimulation(Resource):
                 results = circuit.compute_circuit(input_values)
                 logger.info("电路计算完成")
             except Exception as e:
-                logger.error(f"电路计算失败: {str(e)}")
+                logger.error("电路计算失败: %s", e)
                 raise ValidationError(f"电路计算错误: {str(e)}")
             
             # 为输出生成逻辑表达式
@@ -260,7 +386,7 @@ class CircuitSimulation(Resource):
             try:
                 if len(circuit.outputs) > 0:
                     # 创建检测器
-                    detector = HazardDetector(circuit)
+                    detector = HazardDetector.for_circuit(circuit)
                     
                     # 使用新的方法检测冒险
                     hazard_results = detector._detect_hazards_by_expression()
@@ -271,15 +397,14 @@ class CircuitSimulation(Resource):
                         hazard_type = hazard["hazard_type"]
                         expression = f"检测到 {hazard_type}"
                         simplified_expression = f"变量 {hazard['variable']} 可能导致冒险，原因是存在互补输入的门"
-                        logger.info(f"检测到冒险: {hazard_type}")
+                        logger.info("检测到冒险: %s", hazard_type)
                     else:
                         expression = "未检测到冒险"
                         simplified_expression = "电路不存在变量及其反相同时存在的情况"
                         logger.info("未检测到冒险")
             except Exception as e:
-                logger.error(f"冒险检测失败: {str(e)}")
                 # 不要因为冒险检测失败而中断整个仿真
-                logger.error(traceback.format_exc())
+                logger.exception("冒险检测失败: %s", e)
             
             return {
                 "status": "success",
@@ -290,22 +415,31 @@ class CircuitSimulation(Resource):
             }
             
         except ValidationError as e:
-            logger.error(f"验证错误: {str(e)}")
+            logger.error("验证错误: %s", e)
             api.abort(400, str(e))
         except Exception as e:
-            logger.error(f"服务器内部错误: {str(e)}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception("服务器内部错误: %s", e)
             api.abort(500, f"服务器内部错误: {str(e)}")
 
 @api.route('/circuits')
 class CircuitList(Resource):
     """电路列表API"""
     
+    @api.expect(circuit_list_args)
     @api.response(200, '获取成功')
+    @api.response(400, '分页参数错误')
     def get(self):
-        """获取所有电路"""
-        circuits = CircuitDAL.get_all_circuits()
+        """分页获取电路列表"""
+        args = circuit_list_args.parse_args()
+        per_page = args['per_page']
+        circuits = CircuitDAL.get_circuits_page(args['cursor'], per_page)
+        
+        # 多取的一条仅用于判断是否存在下一页
+        next_cursor = None
+        if len(circuits) > per_page:
+            circuits = circuits[:per_page]
+            next_cursor = circuits[-1].id
+        
         return {
             "status": "success",
             "circuits": [
@@ -313,21 +447,37 @@ class CircuitList(Resource):
                     "id": c.id,
                     "name": c.name,
                     "expression": c.expression,
-                    "created_at": c.created_at.isoformat()
+                    "created_at": c.created_at
                 }
                 for c in circuits
-            ]
+            ],
+            "next_cursor": next_cursor
         }
 
+def _circuit_etag(circuit_id: int, updated_at: Optional[datetime]) -> str:
+    """根据电路ID和更新时间生成ETag值"""
+    version = int(updated_at.timestamp() * 1000000) if updated_at else 0
+    return f"{circuit_id}-{version}"
+
 @api.route('/circuits/<int:circuit_id>')
 class CircuitDetail(Resource):
     """电路详情API"""
     
     @api.response(200, '获取成功')
+    @api.response(304, '电路未修改')
     @api.response(404, '电路不存在')
     def get(self, circuit_id):
-        """获取电路详情"""
-        circuit = CircuitDAL.get_circuit_by_id(circuit_id)
+        """获取电路详情，支持If-None-Match条件请求"""
+        row = CircuitDAL.get_circuit_updated_at(circuit_id)
+        if row is None:
+            api.abort(404, "电路不存在")
+        
+        # 未修改时直接返回304，跳过明细查询和序列化
+        etag = _circuit_etag(circuit_id, row[0])
+        if request.if_none_match.contains_weak(etag):
+            return Response(status=304, headers={"ETag": quote_etag(etag, weak=True)})
+        
+        circuit = CircuitDAL.get_circuit_detail(circuit_id)
         if not circuit:
             api.abort(404, "电路不存在")
             
@@ -350,12 +500,12 @@ class CircuitDetail(Resource):
                         "type": r.result_type,
                         "description": r.description,
                         "details": r.details,
-                        "created_at": r.created_at.isoformat()
+                        "created_at": r.created_at
                     }
                     for r in circuit.detection_results
                 ]
             }
-        }
+        }, 200, {"ETag": quote_etag(etag, weak=True)}
     
     @api.response(200, '删除成功')
     @api.response(404, '电路不存在')
@@ -1,16 +1,22 @@
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
+import sqlalchemy as sa
+from sqlalchemy.orm import selectinload
 from app import db
-from app.models.database import Circuit, Gate, Connection, DetectionResult
+from app.models.database import Circuit, Gate, Net, Connection, DetectionResult
 
 class CircuitDAL:
-    """电路数据访问层"""
+    """
+    电路数据访问层
+    
+    写入方法只flush不提交，事务由调用方统一commit
+    """
     
     @staticmethod
     def create_circuit(name: str, expression: str = None) -> Circuit:
         """创建新电路"""
         circuit = Circuit(name=name, expression=expression)
         db.session.add(circuit)
-        db.session.commit()
+        db.session.flush()
         return circuit
     
     @staticmethod
@@ -23,22 +29,87 @@ class CircuitDAL:
             circuit_id=circuit.id
         )
         db.session.add(gate)
-        db.session.commit()
+        db.session.flush()
         return gate
     
+    @staticmethod
+    def _ensure_nets(circuit: Circuit, names: Iterable[str]) -> Dict[str, int]:
+        """
+        获取电路中线网名称到ID的映射，不存在的线网批量插入
+        
+        Args:
+            circuit: 电路
+            names: 线网名称(端口/门ID)
+            
+        Returns:
+            线网名称到ID的映射
+        """
+        names = list(dict.fromkeys(names))
+        net_ids = dict(db.session.execute(
+            sa.select(Net.name, Net.id).where(
+                Net.circuit_id == circuit.id, Net.name.in_(names)
+            )
+        ).all())
+        missing = [name for name in names if name not in net_ids]
+        if missing:
+            rows = db.session.execute(
+                sa.insert(Net).returning(Net.name, Net.id),
+                [{"circuit_id": circuit.id, "name": name} for name in missing]
+            )
+            net_ids.update(rows.all())
+        return net_ids
+    
     @staticmethod
     def add_connection(circuit: Circuit, from_id: str, to_id: str, delay: float) -> Connection:
         """添加连接"""
+        net_ids = CircuitDAL._ensure_nets(circuit, (from_id, to_id))
         connection = Connection(
-            from_id=from_id,
-            to_id=to_id,
+            from_net_id=net_ids[from_id],
+            to_net_id=net_ids[to_id],
             delay=delay,
             circuit_id=circuit.id
         )
         db.session.add(connection)
-        db.session.commit()
+        db.session.flush()
         return connection
     
+    @staticmethod
+    def bulk_add_gates(circuit: Circuit, gates: Iterable) -> None:
+        """批量添加逻辑门，单条INSERT语句完成写入"""
+        values = [
+            {
+                "gate_id": gate.id,
+                "type": gate.type,
+                "delay": gate.delay,
+                "circuit_id": circuit.id
+            }
+            for gate in gates
+        ]
+        if values:
+            db.session.execute(sa.insert(Gate), values)
+    
+    @staticmethod
+    def bulk_add_connections(circuit: Circuit, connections: Iterable[Dict]) -> None:
+        """批量添加连接，端点先映射为线网ID，再以单条INSERT语句完成写入"""
+        connections = list(connections)
+        if not connections:
+            return
+        
+        net_ids = CircuitDAL._ensure_nets(
+            circuit,
+            (name for conn in connections for name in (conn["from"], conn["to"]))
+        )
+        values = [
+            {
+                "from_net_id": net_ids[conn["from"]],
+                "to_net_id": net_ids[conn["to"]],
+                "delay": conn["delay"],
+                "circuit_id": circuit.id
+            }
+            for conn in connections
+        ]
+        db.session.execute(sa.insert(Connection), values)
+    
     @staticmethod
     def add_detection_result(
         circuit: Circuit,
@@ -54,7 +125,8 @@ class CircuitDAL:
             details=details
         )
         db.session.add(result)
-        db.session.commit()
+        circuit.touch()
+        db.session.flush()
         return result
     
     @staticmethod
@@ -63,16 +135,73 @@ class CircuitDAL:
         return Circuit.query.get(circuit_id)
     
     @staticmethod
-    def get_all_circuits() -> List[Circuit]:
-        """获取所有电路"""
-        return Circuit.query.all()
+    def get_circuit_updated_at(circuit_id: int) -> Optional[sa.Row]:
+        """
+        只查询电路的更新时间，用于生成ETag
+        
+        Returns:
+            (updated_at,) 行，电路不存在时返回None
+        """
+        stmt = sa.select(
+            sa.func.coalesce(Circuit.updated_at, Circuit.created_at)
+        ).where(Circuit.id == circuit_id)
+        return db.session.execute(stmt).first()
+    
+    @staticmethod
+    def get_circuit_detail(circuit_id: int) -> Optional[Circuit]:
+        """根据ID获取电路，并预加载门和检测结果"""
+        stmt = (
+            sa.select(Circuit)
+            .options(
+                selectinload(Circuit.gates),
+                selectinload(Circuit.detection_results)
+            )
+            .where(Circuit.id == circuit_id)
+        )
+        return db.session.execute(stmt).scalar_one_or_none()
+    
+    @staticmethod
+    def _circuit_summary_select() -> sa.Select:
+        """电路概要信息(id、名称、表达式、创建时间)的查询，按id排序"""
+        return sa.select(
+            Circuit.id,
+            Circuit.name,
+            Circuit.expression,
+            Circuit.created_at
+        ).order_by(Circuit.id)
+    
+    @staticmethod
+    def get_all_circuits() -> List[sa.Row]:
+        """获取所有电路的概要信息(id、名称、表达式、创建时间)"""
+        return db.session.execute(CircuitDAL._circuit_summary_select()).all()
+    
+    @staticmethod
+    def get_circuits_page(cursor: Optional[int], per_page: int) -> List[sa.Row]:
+        """
+        按id键集分页获取电路概要信息
+        
+        Args:
+            cursor: 上一页最后一条记录的id，None表示第一页
+            per_page: 每页数量
+            
+        Returns:
+            最多per_page + 1条记录，多出的一条用于判断是否还有下一页
+        """
+        stmt = CircuitDAL._circuit_summary_select().limit(per_page + 1)
+        if cursor is not None:
+            stmt = stmt.where(Circuit.id > cursor)
+        return db.session.execute(stmt).all()
     
     @staticmethod
     def delete_circuit(circuit_id: int) -> bool:
-        """删除电路"""
-        circuit = Circuit.query.get(circuit_id)
-        if circuit:
-            db.session.delete(circuit)
-            db.session.commit()
-            return True
-        return False 
\ No newline at end of file
+        """删除电路及其门、连接、线网和检测结果，每张表一条DELETE语句"""
+        # 连接引用线网，需先于线网删除
+        for model in (Gate, Connection, Net, DetectionResult):
+            db.session.execute(
+                sa.delete(model).where(model.circuit_id == circuit_id)
+            )
+        deleted = db.session.execute(
+            sa.delete(Circuit).where(Circuit.id == circuit_id)
+        ).rowcount
+        db.session.commit()
+        return deleted > 0 
\ No newline at end of file
@@ -1,10 +1,13 @@
 from typing import List, Optional
 from app import db
 from app.models.database import Circuit, DetectionResult
-from datetime import datetime, UTC
 
 class DetectionDAL:
-    """检测结果数据访问层"""
+    """
+    检测结果数据访问层
+    
+    写入方法只flush不提交，事务由调用方统一commit
+    """
     
     @staticmethod
     def get_circuit_results(circuit_id: int) -> List[DetectionResult]:
@@ -15,7 +18,7 @@ class DetectionDAL:
     def get_latest_result(circuit_id: int) -> Optional[DetectionResult]:
         """获取电路的最新检测结果"""
         return DetectionResult.query.filter_by(circuit_id=circuit_id)\
-            .order_by(DetectionResult.created_at.desc())\
+            .order_by(DetectionResult.created_at.desc(), DetectionResult.id.desc())\
             .first()
     
     @staticmethod
@@ -41,12 +44,12 @@ class DetectionDAL:
             circuit_id=circuit.id,
             result_type="race_condition",
             description=description,
-            details=details,
-            created_at=datetime.now(UTC)
+            details=details
         )
         
         db.session.add(result)
-        db.session.commit()
+        circuit.touch()
+        db.session.flush()
         return result
     
     @staticmethod
@@ -71,10 +74,10 @@ class DetectionDAL:
             circuit_id=circuit.id,
             result_type="hazard",
             description=description,
-            details=details,
-            created_at=datetime.now(UTC)
+            details=details
         )
         
         db.session.add(result)
-        db.session.commit()
+        circuit.touch()
+        db.session.flush()
         return result 
\ No newline at end of file
@@ -1,9 +1,151 @@
-from typing import Dict, List, Optional
+from array import array
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Sequence, Tuple
+import hashlib
 import logging
+import threading
+import traceback
+import numpy as np
+
+try:
+    from app.models import _circuit_eval
+except ImportError:  # 未编译Cython扩展时批量计算使用NumPy实现
+    _circuit_eval = None
+
+try:
+    from numba import njit
+except ImportError:  # 未安装numba时内核按普通Python函数执行
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+logger = logging.getLogger(__name__)
+
+# 批量计算时每个uint64字容纳的输入组合数
+BATCH_WORD_BITS = 64
+
+# 编译后电路中的门类型编码
+GATE_TYPE_CODES = {"AND": 0, "OR": 1, "NOT": 2}
+
+# 每个电路缓存的计算结果数量上限
+EVAL_CACHE_SIZE = 1024
+
+# 按电路结构共享的编译结果缓存，结构完全相同的电路复用同一份结构数组
+COMPILED_CACHE_SIZE = 128
+_COMPILED_CIRCUIT_CACHE: 'OrderedDict[bytes, CompiledCircuit]' = OrderedDict()
+_COMPILED_CIRCUIT_LOCK = threading.Lock()
+
+
+def pack_input_bits(input_matrix: np.ndarray) -> np.ndarray:
+    """
+    将(N, 输入数)的0/1矩阵按位打包为每个输入一行的uint64数组
+    
+    Args:
+        input_matrix: 每行一组输入取值的0/1矩阵
+        
+    Returns:
+        形状为(输入数, ceil(N/64))的uint64数组，第k组取值位于第k位
+    """
+    bits = np.asarray(input_matrix).astype(bool).T
+    num_words = -(-bits.shape[1] // BATCH_WORD_BITS)
+    padded = np.zeros((bits.shape[0], num_words * BATCH_WORD_BITS), dtype=bool)
+    padded[:, :bits.shape[1]] = bits
+    packed = np.packbits(padded, axis=1, bitorder='little')
+    return np.ascontiguousarray(packed).view('<u8')
+
+
+def unpack_bits(words: np.ndarray, count: int) -> np.ndarray:
+    """
+    将按位打包的uint64数组还原为0/1数组
+    
+    Args:
+        words: pack_input_bits得到的单行uint64数组
+        count: 输入组合数量
+        
+    Returns:
+        长度为count的uint8数组
+    """
+    as_bytes = np.ascontiguousarray(words, dtype='<u8').view(np.uint8)
+    return np.unpackbits(as_bytes, bitorder='little')[:count]
+
+@njit(cache=True)
+def _eval_gates(values, types, offsets, indices, outs):
+    """
+    按拓扑顺序计算编译后电路中所有门的输出
+    
+    Args:
+        values: 线网值数组(0/1)，输入已填入，门的输出写回此数组
+        types: 门类型编码数组
+        offsets: 每个门的输入在indices中的起止偏移(CSR)
+        indices: 门输入对应的线网下标
+        outs: 门输出对应的线网下标
+    """
+    for i in range(types.shape[0]):
+        t = types[i]
+        start = offsets[i]
+        end = offsets[i + 1]
+        if t == 0:
+            r = 1
+            for k in range(start, end):
+                r &= values[indices[k]]
+        elif t == 1:
+            r = 0
+            for k in range(start, end):
+                r |= values[indices[k]]
+        else:
+            r = values[indices[start]] ^ 1
+        values[outs[i]] = r
+
+
+class CompiledCircuit:
+    """
+    电路的结构数组(SoA)表示，供编译后的求值内核使用
+    
+    线网按输入端口在前、门按拓扑顺序在后的方式编号，
+    第i个门的输出写入下标 num_inputs + i。
+    """
+    
+    __slots__ = ('id_by_index', 'net_id_to_index', 'num_inputs', 'types',
+                 'input_offsets', 'input_indices', 'output_indices', 'num_nets')
+    
+    def __init__(
+        self,
+        id_by_index: List[str],
+        net_id_to_index: Dict[str, int],
+        num_inputs: int,
+        types: np.ndarray,
+        input_offsets: np.ndarray,
+        input_indices: np.ndarray,
+        output_indices: np.ndarray
+    ):
+        """
+        初始化编译后的电路
+        
+        Args:
+            id_by_index: 下标到线网(输入端口/门)ID的映射
+            net_id_to_index: 线网ID到下标的映射
+            num_inputs: 输入端口数量
+            types: 门类型编码数组
+            input_offsets: 每个门的输入在input_indices中的起止偏移
+            input_indices: 门输入对应的线网下标
+            output_indices: 门输出对应的线网下标
+        """
+        self.id_by_index = id_by_index
+        self.net_id_to_index = net_id_to_index
+        self.num_inputs = num_inputs
+        self.types = types
+        self.input_offsets = input_offsets
+        self.input_indices = input_indices
+        self.output_indices = output_indices
+        self.num_nets = len(id_by_index)
+
 
 class LogicGate:
     """逻辑门类"""
     
+    __slots__ = ('id', 'type', 'delay', 'inputs', 'output', '_type_code')
+    
     def __init__(
         self,
         gate_id: str,
@@ -27,6 +169,13 @@ class LogicGate:
         self.delay = delay
         self.inputs = inputs
         self.output = output
+        # 门类型编码，不支持的类型为-1，计算时报错
+        self._type_code = GATE_TYPE_CODES.get(gate_type, -1)
+    
+    @property
+    def type_code(self) -> int:
+        """门类型编码(见GATE_TYPE_CODES)，不支持的类型为-1"""
+        return self._type_code
         
     def compute_output(self, input_values: Dict[str, int]) -> int:
         """
@@ -38,29 +187,78 @@ class LogicGate:
         Returns:
             输出值(0/1)
         """
-        # 确保所有输入都有值
-        for input_id in self.inputs:
-            if input_id not in input_values:
-                raise ValueError(f"输入 {input_id} 没有值")
+        # 根据门类型编码计算输出，输入值为0/1，直接按位归约
+        code = self._type_code
+        try:
+            values = [input_values[input_id] for input_id in self.inputs]
+        except KeyError as e:
+            raise ValueError(f"输入 {e.args[0]} 没有值") from None
         
-        # 根据门类型计算输出
-        if self.type == "AND":
+        if code == 0:
             # AND门: 所有输入为1时输出为1，否则为0
-            return 1 if all(input_values[input_id] == 1 for input_id in self.inputs) else 0
+            result = 1
+            for value in values:
+                result &= value
+            return result
         
-        elif self.type == "OR":
+        elif code == 1:
             # OR门: 任一输入为1时输出为1，否则为0
-            return 1 if any(input_values[input_id] == 1 for input_id in self.inputs) else 0
+            result = 0
+            for value in values:
+                result |= value
+            return result
         
-        elif self.type == "NOT":
+        elif code == 2:
             # NOT门: 输入为0时输出为1，输入为1时输出为0
-            if len(self.inputs) != 1:
-                raise ValueError(f"NOT门应该只有一个输入，但 {self.id} 有 {len(self.inputs)} 个输入")
-            return 1 - input_values[self.inputs[0]]
+            if len(values) != 1:
+                raise ValueError(f"NOT门应该只有一个输入，但 {self.id} 有 {len(values)} 个输入")
+            return values[0] ^ 1
         
         else:
             raise ValueError(f"不支持的门类型: {self.type}")
 
+def _validate_and_build_gate(gate_data: Dict) -> LogicGate:
+    """校验门数据并创建LogicGate，缺少字段时抛出ValueError"""
+    try:
+        return LogicGate(
+            gate_data["id"],
+            gate_data["type"],
+            gate_data["delay"],
+            gate_data["inputs"],
+            gate_data["output"]
+        )
+    except KeyError as e:
+        logger.error(f"门数据缺少{e.args[0]}字段: {gate_data}")
+        raise ValueError(f"门数据缺少{e.args[0]}字段") from None
+
+
+def _validate_input(input_data: Dict) -> Tuple[str, str, int]:
+    """校验输入端口数据，返回(ID, 名称, 初始值)"""
+    try:
+        return input_data["id"], input_data["name"], input_data["initial_value"]
+    except KeyError as e:
+        logger.error(f"输入数据缺少{e.args[0]}字段: {input_data}")
+        raise ValueError(f"输入数据缺少{e.args[0]}字段") from None
+
+
+def _validate_output(output_data: Dict) -> Tuple[str, str, str]:
+    """校验输出端口数据，返回(ID, 名称, 数据来源)"""
+    try:
+        return output_data["id"], output_data["name"], output_data["source"]
+    except KeyError as e:
+        logger.error(f"输出数据缺少{e.args[0]}字段: {output_data}")
+        raise ValueError(f"输出数据缺少{e.args[0]}字段") from None
+
+
+def _validate_connection(conn_data: Dict) -> Tuple[str, str, float]:
+    """校验连接数据，返回(起始ID, 目标ID, 延迟)"""
+    try:
+        return conn_data["from"], conn_data["to"], conn_data["delay"]
+    except KeyError as e:
+        logger.error(f"连接数据缺少{e.args[0]}字段: {conn_data}")
+        raise ValueError(f"连接数据缺少{e.args[0]}字段") from None
+
+
 class Circuit:
     """电路类"""
     
@@ -76,6 +274,51 @@ class Circuit:
         self.inputs: Dict[str, Dict] = {}
         self.outputs: Dict[str, Dict] = {}
         self.connections: List[Dict] = []
+        # 连接端点和延迟的并行数组，供构建邻接表时顺序遍历
+        self._conn_from: List[str] = []
+        self._conn_to: List[str] = []
+        self._conn_delay = array('d')
+        # 结构版本号，每次修改电路结构时递增，用于使派生缓存失效
+        self.version = 0
+        # 拓扑排序结果及按该顺序排列的(门ID, 门, 输入ID元组)缓存
+        self._sorted_gates: Optional[List[str]] = None
+        self._gate_input_lists: Optional[List[Tuple[str, LogicGate, Tuple[str, ...]]]] = None
+        # 门之间的邻接表和入度表缓存
+        self._adj: Optional[Tuple[Dict[str, List[str]], Dict[str, int]]] = None
+        # 编译后的结构数组表示缓存
+        self._gate_soa: Optional[CompiledCircuit] = None
+        # 线网值数组到结果字典的投影缓存
+        self._result_projection: Optional[
+            Tuple[List[str], np.ndarray, List[Tuple[str, str]], Dict[str, int]]
+        ] = None
+        # 输入取值元组到计算结果的LRU缓存
+        self._eval_cache: 'OrderedDict[Tuple[int, ...], Dict[str, int]]' = OrderedDict()
+    
+    def _invalidate(self) -> None:
+        """电路结构变化时递增版本号并清除派生缓存"""
+        self.version += 1
+        self._sorted_gates = None
+        self._gate_input_lists = None
+        self._adj = None
+        self._gate_soa = None
+        self._result_projection = None
+        self._eval_cache.clear()
+    
+    def _get_gate_input_lists(self) -> List[Tuple[str, LogicGate, Tuple[str, ...]]]:
+        """
+        获取按拓扑顺序排列的门及其输入，结构不变时复用缓存
+        
+        Returns:
+            (门ID, 门, 输入ID元组)列表
+        """
+        if self._gate_input_lists is None:
+            if self._sorted_gates is None:
+                self._sorted_gates = self._topological_sort()
+            self._gate_input_lists = [
+                (gate_id, self.gates[gate_id], tuple(self.gates[gate_id].inputs))
+                for gate_id in self._sorted_gates
+            ]
+        return self._gate_input_lists
     
     def add_gate(self, gate: LogicGate) -> None:
         """
@@ -85,6 +328,7 @@ class Circuit:
             gate: LogicGate实例
         """
         self.gates[gate.id] = gate
+        self._invalidate()
     
     def add_input(self, input_id: str, name: str, initial_value: int) -> None:
         """
@@ -99,6 +343,7 @@ class Circuit:
             "name": name,
             "initial_value": initial_value
         }
+        self._invalidate()
     
     def add_output(self, output_id: str, name: str, source: str) -> None:
         """
@@ -113,6 +358,7 @@ class Circuit:
             "name": name,
             "source": source
         }
+        self._invalidate()
     
     def add_connection(self, from_id: str, to_id: str, delay: float) -> None:
         """
@@ -128,6 +374,10 @@ class Circuit:
             "to": to_id,
             "delay": delay
         })
+        self._conn_from.append(from_id)
+        self._conn_to.append(to_id)
+        self._conn_delay.append(delay)
+        self._invalidate()
     
     def compute_circuit(self, input_values: Dict[str, int] = None) -> Dict[str, int]:
         """
@@ -149,41 +399,289 @@ class Circuit:
                 if input_id not in self.inputs:
                     raise ValueError(f"未知的输入ID: {input_id}")
         
-        # 计算结果字典，初始包含输入值
-        results = input_values.copy()
+        # 输入齐全时按输入取值元组查询结果缓存
+        cache_key = None
+        if len(input_values) == len(self.inputs):
+            cache_key = tuple(input_values[input_id] for input_id in self.inputs)
+            cached = self._eval_cache.get(cache_key)
+            if cached is not None:
+                self._eval_cache.move_to_end(cache_key)
+                return cached.copy()
+        
+        # 转换为输入向量后在编译后的结构数组上计算所有门
+        keys, indices, input_aliases, template = self._get_result_projection()
+        if len(input_values) != len(self.inputs):
+            self._require_gate_inputs(input_values)
+        values = self.compute_circuit_from_vector(
+            [1 if input_values.get(input_id) == 1 else 0 for input_id in self.inputs]
+        )
+        
+        # 输入齐全时复制预分配的模板，避免结果字典逐步扩容；
+        # 部分输入时保持结果中只含已提供的输入
+        if len(input_values) == len(self.inputs):
+            results = template.copy()
+            results.update(input_values)
+        else:
+            results = input_values.copy()
+        
+        # 门及以门为来源的输出在一次投影中写入结果
+        results.update(zip(keys, values[indices].tolist()))
+        
+        # 直接以输入端口为来源的输出沿用输入值
+        for output_id, source_id in input_aliases:
+            if source_id not in input_values:
+                raise ValueError(f"无法计算输出 {output_id} 的值，未找到源 {source_id}")
+            results[output_id] = input_values[source_id]
+        
+        if cache_key is not None:
+            self._eval_cache[cache_key] = results
+            if len(self._eval_cache) > EVAL_CACHE_SIZE:
+                self._eval_cache.popitem(last=False)
+            return results.copy()
+        
+        return results
+    
+    def compute_circuit_from_vector(self, vec: Sequence[int]) -> np.ndarray:
+        """
+        按输入向量计算电路所有线网的值，不构造中间字典
+        
+        Args:
+            vec: 按self.inputs顺序排列的输入取值(0/1)
+            
+        Returns:
+            int8线网值数组，下标与compile()结果的net_id_to_index一致
+        """
+        soa = self.compile()
+        if len(vec) != soa.num_inputs:
+            raise ValueError(f"输入向量长度应为 {soa.num_inputs}，实际为 {len(vec)}")
         
-        # 创建拓扑排序
-        sorted_gates = self._topological_sort()
+        values = np.zeros(soa.num_nets, dtype=np.int8)
+        values[:soa.num_inputs] = vec
+        _eval_gates(values, soa.types, soa.input_offsets,
+                    soa.input_indices, soa.output_indices)
+        return values
+    
+    def _get_result_projection(
+        self
+    ) -> Tuple[List[str], np.ndarray, List[Tuple[str, str]], Dict[str, int]]:
+        """
+        获取从线网值数组到结果字典的投影，结构不变时复用缓存
         
-        # 按拓扑顺序计算每个门的输出
-        for gate_id in sorted_gates:
-            gate = self.gates[gate_id]
-            gate_inputs = {}
+        Returns:
+            (门及以门为来源的输出的键列表, 对应的线网下标数组,
+             以输入端口为来源的(输出ID, 输入ID)列表, 结果字典模板)
+        """
+        if self._result_projection is None:
+            soa = self.compile()
+            keys = soa.id_by_index[soa.num_inputs:]
+            indices = list(range(soa.num_inputs, soa.num_nets))
+            input_aliases = []
             
-            # 获取该门的所有输入值
-            for input_id in gate.inputs:
-                # 如果输入是另一个门的输出
-                if input_id in results:
-                    gate_inputs[input_id] = results[input_id]
+            for output_id, output_data in self.outputs.items():
+                source_id = output_data["source"]
+                if source_id in self.gates:
+                    keys.append(output_id)
+                    indices.append(soa.net_id_to_index[source_id])
+                elif source_id in self.inputs:
+                    input_aliases.append((output_id, source_id))
                 else:
+                    raise ValueError(f"无法计算输出 {output_id} 的值，未找到源 {source_id}")
+            
+            # 结果字典模板，键顺序为输入、门、输出，复制即得到预分配好容量的字典
+            template = dict.fromkeys(self.inputs, 0)
+            template.update(dict.fromkeys(keys, 0))
+            template.update(dict.fromkeys((output_id for output_id, _ in input_aliases), 0))
+            
+            self._result_projection = (
+                keys, np.array(indices, dtype=np.intp), input_aliases, template
+            )
+        return self._result_projection
+    
+    def _require_gate_inputs(self, input_values: Dict[str, int]) -> None:
+        """
+        检查缺失的输入是否被某个门使用
+        
+        Args:
+            input_values: 输入端口ID到值的映射
+            
+        Raises:
+            ValueError: 某个门的输入端口没有提供值
+        """
+        missing = {input_id for input_id in self.inputs if input_id not in input_values}
+        for gate_id, _, gate_input_ids in self._get_gate_input_lists():
+            for input_id in gate_input_ids:
+                if input_id in missing:
+                    raise ValueError(f"无法计算门 {gate_id} 的输入 {input_id} 的值")
+    
+    def _structure_key(self) -> bytes:
+        """
+        计算电路结构的摘要，作为编译结果的共享缓存键
+        
+        编译结果包含线网ID，因此键覆盖输入ID、门(ID、类型、输入)和连接端点，
+        不含输出端口和延迟等不影响编译结果的字段。
+        
+        Returns:
+            结构摘要
+        """
+        structure = (
+            tuple(self.inputs),
+            tuple((gate.id, gate.type, tuple(gate.inputs)) for gate in self.gates.values()),
+            tuple(self._conn_from),
+            tuple(self._conn_to)
+        )
+        return hashlib.blake2b(repr(structure).encode(), digest_size=16).digest()
+    
+    def compile(self) -> CompiledCircuit:
+        """
+        将电路按拓扑顺序编译为整型数组表示，结构不变时复用缓存
+        
+        Returns:
+            CompiledCircuit实例
+        """
+        if self._gate_soa is not None:
+            return self._gate_soa
+        
+        # 其他电路已编译过相同结构时直接复用
+        key = self._structure_key()
+        with _COMPILED_CIRCUIT_LOCK:
+            cached = _COMPILED_CIRCUIT_CACHE.get(key)
+            if cached is not None:
+                _COMPILED_CIRCUIT_CACHE.move_to_end(key)
+        if cached is not None:
+            self._gate_soa = cached
+            return cached
+        
+        order = self._get_gate_input_lists()
+        num_inputs = len(self.inputs)
+        id_by_index = list(self.inputs)
+        net_id_to_index = {input_id: i for i, input_id in enumerate(id_by_index)}
+        types = np.empty(len(order), dtype=np.int8)
+        input_offsets = np.zeros(len(order) + 1, dtype=np.int32)
+        output_indices = np.empty(len(order), dtype=np.int32)
+        input_indices = []
+        
+        for i, (gate_id, gate, gate_input_ids) in enumerate(order):
+            type_code = GATE_TYPE_CODES.get(gate.type)
+            if type_code is None:
+                raise ValueError(f"不支持的门类型: {gate.type}")
+            if gate.type == "NOT" and len(gate_input_ids) != 1:
+                raise ValueError(f"NOT门应该只有一个输入，但 {gate_id} 有 {len(gate_input_ids)} 个输入")
+            
+            for input_id in gate_input_ids:
+                if input_id not in net_id_to_index:
                     raise ValueError(f"无法计算门 {gate_id} 的输入 {input_id} 的值")
+                input_indices.append(net_id_to_index[input_id])
+            
+            # 门的线网下标在处理完其输入后分配，与逐门计算的可达性一致
+            net_id_to_index[gate_id] = num_inputs + i
+            id_by_index.append(gate_id)
+            types[i] = type_code
+            input_offsets[i + 1] = len(input_indices)
+            output_indices[i] = num_inputs + i
+        
+        self._gate_soa = CompiledCircuit(
+            id_by_index,
+            net_id_to_index,
+            num_inputs,
+            types,
+            input_offsets,
+            np.array(input_indices, dtype=np.int32),
+            output_indices
+        )
+        with _COMPILED_CIRCUIT_LOCK:
+            _COMPILED_CIRCUIT_CACHE[key] = self._gate_soa
+            if len(_COMPILED_CIRCUIT_CACHE) > COMPILED_CACHE_SIZE:
+                _COMPILED_CIRCUIT_CACHE.popitem(last=False)
+        return self._gate_soa
+    
+    def compute_circuit_batch(self, input_matrix: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        批量计算多组输入下的电路值，每64组输入打包进一个uint64按位并行计算
+        
+        Args:
+            input_matrix: 形状为(N, 输入数)的0/1矩阵，列顺序与self.inputs一致
+            
+        Returns:
+            端口/门ID到长度为N的0/1数组的映射
+        """
+        input_matrix = np.asarray(input_matrix)
+        if input_matrix.ndim != 2 or input_matrix.shape[1] != len(self.inputs):
+            raise ValueError(
+                f"输入矩阵形状应为(N, {len(self.inputs)})，实际为 {input_matrix.shape}"
+            )
+        
+        count = input_matrix.shape[0]
+        input_ids = list(self.inputs)
+        
+        # 单组输入直接走逐值计算
+        if count == 1:
+            row = dict(zip(input_ids, (int(v) for v in input_matrix[0])))
+            return {key: np.array([value], dtype=np.uint8)
+                    for key, value in self.compute_circuit(row).items()}
+        
+        # 已编译Cython扩展时逐组并行计算
+        if _circuit_eval is not None:
+            soa = self.compile()
+            net_values = np.zeros((count, soa.num_nets), dtype=np.uint8)
+            net_values[:, :soa.num_inputs] = input_matrix.astype(bool)
+            _circuit_eval.eval_batch(net_values, soa.types, soa.input_offsets,
+                                     soa.input_indices, soa.output_indices)
+            columns = dict(zip(soa.id_by_index, net_values.T))
+            for output_id, output_data in self.outputs.items():
+                source_id = output_data["source"]
+                if source_id not in columns:
+                    raise ValueError(f"无法计算输出 {output_id} 的值，未找到源 {source_id}")
+                columns[output_id] = columns[source_id]
+            return columns
+        
+        packed = pack_input_bits(input_matrix)
+        values: Dict[str, np.ndarray] = dict(zip(input_ids, packed))
+        
+        for gate_id, gate, gate_input_ids in self._get_gate_input_lists():
+            try:
+                arrs = [values[input_id] for input_id in gate_input_ids]
+            except KeyError as e:
+                raise ValueError(f"无法计算门 {gate_id} 的输入 {e.args[0]} 的值")
             
-            # 计算该门的输出
-            results[gate_id] = gate.compute_output(gate_inputs)
+            if gate.type == "AND":
+                values[gate_id] = np.bitwise_and.reduce(arrs)
+            elif gate.type == "OR":
+                values[gate_id] = np.bitwise_or.reduce(arrs)
+            elif gate.type == "NOT":
+                if len(arrs) != 1:
+                    raise ValueError(f"NOT门应该只有一个输入，但 {gate_id} 有 {len(arrs)} 个输入")
+                values[gate_id] = np.invert(arrs[0])
+            else:
+                raise ValueError(f"不支持的门类型: {gate.type}")
         
-        # 计算电路输出
-        output_results = {}
         for output_id, output_data in self.outputs.items():
             source_id = output_data["source"]
-            if source_id in results:
-                output_results[output_id] = results[source_id]
-            else:
+            if source_id not in values:
                 raise ValueError(f"无法计算输出 {output_id} 的值，未找到源 {source_id}")
+            values[output_id] = values[source_id]
         
-        # 添加输出结果
-        results.update(output_results)
+        return {key: unpack_bits(words, count) for key, words in values.items()}
+    
+    def _build_adjacency(self) -> Tuple[Dict[str, List[str]], Dict[str, int]]:
+        """
+        构建门之间的邻接表和入度表，结构不变时复用缓存
         
-        return results
+        Returns:
+            (邻接表, 入度表)
+        """
+        if self._adj is None:
+            gates_set = set(self.gates)
+            graph = {gate_id: [] for gate_id in self.gates}
+            in_degree = dict.fromkeys(self.gates, 0)
+            
+            # 单次遍历连接，只考虑门之间的连接
+            for from_id, to_id in zip(self._conn_from, self._conn_to):
+                if from_id in gates_set and to_id in gates_set:
+                    graph[from_id].append(to_id)
+                    in_degree[to_id] += 1
+            
+            self._adj = (graph, in_degree)
+        return self._adj
     
     def _topological_sort(self) -> List[str]:
         """
@@ -192,25 +690,16 @@ class Circuit:
         Returns:
             排序后的门ID列表
         """
-        # 构建邻接表
-        graph = {gate_id: [] for gate_id in self.gates}
-        in_degree = {gate_id: 0 for gate_id in self.gates}
-        
-        # 计算入度和建立邻接关系
-        for conn in self.connections:
-            from_id, to_id = conn["from"], conn["to"]
-            
-            # 只考虑门之间的连接
-            if from_id in self.gates and to_id in self.gates:
-                graph[from_id].append(to_id)
-                in_degree[to_id] += 1
+        graph, initial_in_degree = self._build_adjacency()
+        # 排序过程会修改入度，使用副本保持缓存不变
+        in_degree = dict(initial_in_degree)
         
-        # 拓扑排序
-        queue = [gate_id for gate_id, degree in in_degree.items() if degree == 0]
+        # 拓扑排序，使用双端队列保证出队为O(1)
+        queue = deque(gate_id for gate_id, degree in in_degree.items() if degree == 0)
         sorted_gates = []
         
         while queue:
-            gate_id = queue.pop(0)
+            gate_id = queue.popleft()
             sorted_gates.append(gate_id)
             
             for neighbor in graph[gate_id]:
@@ -235,8 +724,6 @@ class Circuit:
         Returns:
             Circuit实例
         """
-        logger = logging.getLogger(__name__)
-        
         # 验证数据结构
         if not isinstance(data, dict):
             logger.error(f"数据不是字典类型: {type(data)}")
@@ -259,70 +746,22 @@ class Circuit:
             
             # 添加门
             for gate_data in circuit_data["gates"]:
-                # 验证门数据
-                required_gate_fields = ["id", "type", "delay", "inputs", "output"]
-                for field in required_gate_fields:
-                    if field not in gate_data:
-                        logger.error(f"门数据缺少{field}字段: {gate_data}")
-                        raise ValueError(f"门数据缺少{field}字段")
-                
-                gate = LogicGate(
-                    gate_data["id"],
-                    gate_data["type"],
-                    gate_data["delay"],
-                    gate_data["inputs"],
-                    gate_data["output"]
-                )
-                circuit.add_gate(gate)
+                circuit.add_gate(_validate_and_build_gate(gate_data))
             
             # 添加输入端口
             for input_data in circuit_data["inputs"]:
-                # 验证输入数据
-                required_input_fields = ["id", "name", "initial_value"]
-                for field in required_input_fields:
-                    if field not in input_data:
-                        logger.error(f"输入数据缺少{field}字段: {input_data}")
-                        raise ValueError(f"输入数据缺少{field}字段")
-                
-                circuit.add_input(
-                    input_data["id"],
-                    input_data["name"],
-                    input_data["initial_value"]
-                )
+                circuit.add_input(*_validate_input(input_data))
             
             # 添加输出端口
             for output_data in circuit_data["outputs"]:
-                # 验证输出数据
-                required_output_fields = ["id", "name", "source"]
-                for field in required_output_fields:
-                    if field not in output_data:
-                        logger.error(f"输出数据缺少{field}字段: {output_data}")
-                        raise ValueError(f"输出数据缺少{field}字段")
-                
-                circuit.add_output(
-                    output_data["id"],
-                    output_data["name"],
-                    output_data["source"]
-                )
+                circuit.add_output(*_validate_output(output_data))
             
             # 添加连接
             for conn_data in circuit_data["connections"]:
-                # 验证连接数据
-                required_conn_fields = ["from", "to", "delay"]
-                for field in required_conn_fields:
-                    if field not in conn_data:
-                        logger.error(f"连接数据缺少{field}字段: {conn_data}")
-                        raise ValueError(f"连接数据缺少{field}字段")
-                
-                circuit.add_connection(
-                    conn_data["from"],
-                    conn_data["to"],
-                    conn_data["delay"]
-                )
-            
-            return circuit
+                circuit.add_connection(*_validate_connection(conn_data))
         except Exception as e:
             logger.error(f"创建电路实例失败: {str(e)}")
-            import traceback
             logger.error(traceback.format_exc())
-            raise ValueError(f"创建电路实例失败: {str(e)}") 
\ No newline at end of file
+            raise ValueError(f"创建电路实例失败: {str(e)}")
+        
+        return circuit 
\ No newline at end of file
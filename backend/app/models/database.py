@@ -1,6 +1,11 @@
 from datetime import datetime, UTC
+from sqlalchemy import func
 from app import db
 
+def _utcnow() -> datetime:
+    """当前UTC时间，作为列默认值使用"""
+    return datetime.now(UTC)
+
 class Circuit(db.Model):
     """电路数据模型"""
     __tablename__ = 'circuits'
@@ -8,13 +13,17 @@ class Circuit(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     expression = db.Column(db.Text, nullable=True)
-    created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC))
-    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
+    created_at = db.Column(db.DateTime, default=_utcnow)
+    updated_at = db.Column(db.DateTime, default=_utcnow, onupdate=_utcnow)
     
     # 关联的门
-    gates = db.relationship('Gate', backref='circuit', lazy=True, cascade='all, delete-orphan')
+    gates = db.relationship('Gate', backref='circuit', lazy='raise', cascade='all, delete-orphan')
     # 关联的检测结果
-    detection_results = db.relationship('DetectionResult', backref='circuit', lazy=True, cascade='all, delete-orphan')
+    detection_results = db.relationship('DetectionResult', backref='circuit', lazy='raise', cascade='all, delete-orphan')
+    
+    def touch(self) -> None:
+        """刷新更新时间，关联数据变化时调用以使缓存的ETag失效"""
+        self.updated_at = _utcnow()
 
 class Gate(db.Model):
     """逻辑门数据模型"""
@@ -27,16 +36,49 @@ class Gate(db.Model):
     circuit_id = db.Column(db.Integer, db.ForeignKey('circuits.id'), nullable=False)
     
     # 门的输入输出关系存储在connections表中
+    
+    # 按电路查询门，circuit_id在前同时覆盖单列查询
+    __table_args__ = (
+        db.Index('ix_gate_circuit_gateid', 'circuit_id', 'gate_id'),
+    )
+
+class Net(db.Model):
+    """线网数据模型，连接端点(输入端口/门)在电路内编号为整数"""
+    __tablename__ = 'nets'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    circuit_id = db.Column(db.Integer, db.ForeignKey('circuits.id'), nullable=False)
+    name = db.Column(db.String(50), nullable=False)  # 端口/门ID，如 'a', 'g1'
+    
+    # 同一电路内线网名称唯一
+    __table_args__ = (
+        db.UniqueConstraint('circuit_id', 'name', name='uq_net_circuit_name'),
+    )
 
 class Connection(db.Model):
     """连接关系数据模型"""
     __tablename__ = 'connections'
     
     id = db.Column(db.Integer, primary_key=True)
-    from_id = db.Column(db.String(50), nullable=False)  # 起始端口/门ID
-    to_id = db.Column(db.String(50), nullable=False)    # 目标端口/门ID
+    # 起始端口/门
+    from_net_id = db.Column(
+        db.Integer, db.ForeignKey('nets.id', name='fk_connection_from_net'), nullable=False
+    )
+    # 目标端口/门
+    to_net_id = db.Column(
+        db.Integer, db.ForeignKey('nets.id', name='fk_connection_to_net'), nullable=False
+    )
     delay = db.Column(db.Float, nullable=False)
     circuit_id = db.Column(db.Integer, db.ForeignKey('circuits.id'), nullable=False)
+    
+    from_net = db.relationship('Net', foreign_keys=[from_net_id])
+    to_net = db.relationship('Net', foreign_keys=[to_net_id])
+    
+    # 按电路及连接的两个方向查询
+    __table_args__ = (
+        db.Index('ix_connection_circuit_from', 'circuit_id', 'from_net_id'),
+        db.Index('ix_connection_circuit_to', 'circuit_id', 'to_net_id'),
+    )
 
 class DetectionResult(db.Model):
     """检测结果数据模型"""
@@ -47,4 +89,10 @@ class DetectionResult(db.Model):
     result_type = db.Column(db.String(20), nullable=False)  # 'race_condition' 或 'hazard'
     description = db.Column(db.Text, nullable=False)
     details = db.Column(db.JSON, nullable=True)
-    created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC)) 
\ No newline at end of file
+    # 由数据库生成创建时间
+    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now()) 
+    
+    # 按电路及结果类型查询
+    __table_args__ = (
+        db.Index('ix_detection_result_circuit_type', 'circuit_id', 'result_type'),
+    )
@@ -0,0 +1,95 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+import logging
+import threading
+import uuid
+
+from app.models.circuit import Circuit
+from app.services.detector import HazardDetector
+
+logger = logging.getLogger(__name__)
+
+
+def _run_detection(circuit: Circuit) -> Dict:
+    """在工作线程中执行竞争冒险检测"""
+    try:
+        return HazardDetector.for_circuit(circuit).detect_hazards()
+    except Exception as e:
+        # 任务失败只在查询时以字符串返回，这里记录一次完整堆栈
+        logger.exception("检测任务执行失败: %s", e)
+        raise
+
+
+class DetectionJobManager:
+    """后台检测任务管理器，检测在线程池中执行，不占用请求线程"""
+
+    def __init__(self, max_workers: int = 4, max_jobs: int = 1024):
+        """
+        初始化任务管理器
+
+        Args:
+            max_workers: 工作线程数量
+            max_jobs: 最多保留的任务数量，超出时丢弃最早完成的任务；
+                未完成的任务达到该数量时拒绝新任务
+        """
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='detection'
+        )
+        self._jobs: 'OrderedDict[str, Future]' = OrderedDict()
+        self._max_jobs = max_jobs
+        self._lock = threading.Lock()
+
+    def submit(self, circuit: Circuit) -> Optional[str]:
+        """
+        提交检测任务
+
+        Args:
+            circuit: 待检测的电路
+
+        Returns:
+            任务ID，未完成的任务已达上限时返回None
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            pending = sum(1 for f in self._jobs.values() if not f.done())
+            if pending >= self._max_jobs:
+                logger.warning("未完成的检测任务已达上限 %d，拒绝新任务", self._max_jobs)
+                return None
+            self._jobs[job_id] = self._executor.submit(_run_detection, circuit)
+            self._evict_finished()
+        logger.info("提交检测任务 %s: %s", job_id, circuit.name)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """
+        查询检测任务状态
+
+        Args:
+            job_id: 任务ID
+
+        Returns:
+            任务状态字典，任务不存在时返回None
+        """
+        with self._lock:
+            future = self._jobs.get(job_id)
+        if future is None:
+            return None
+
+        if not future.done():
+            status = "running" if future.running() else "pending"
+            return {"job_id": job_id, "status": status}
+
+        error = future.exception()
+        if error is not None:
+            return {"job_id": job_id, "status": "failed", "error": str(error)}
+        return {"job_id": job_id, "status": "success", "results": future.result()}
+
+    def _evict_finished(self) -> None:
+        """任务数超出上限时，按提交顺序丢弃已完成的任务"""
+        if len(self._jobs) <= self._max_jobs:
+            return
+        for job_id in [jid for jid, f in self._jobs.items() if f.done()]:
+            del self._jobs[job_id]
+            if len(self._jobs) <= self._max_jobs:
+                break
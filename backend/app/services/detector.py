@@ -1,7 +1,261 @@
-from typing import Dict, List, Set, Tuple, Optional, Any
-from app.models.circuit import Circuit, LogicGate
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from itertools import chain
+from typing import Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+from app.models.circuit import Circuit, LogicGate, GATE_TYPE_CODES, pack_input_bits, unpack_bits
 import logging
+import numpy as np
 import re
+import traceback
+
+try:
+    from numba import njit
+except ImportError:  # 未安装numba时内核按NumPy逐行运算执行
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+_AND_CODE = GATE_TYPE_CODES["AND"]
+_OR_CODE = GATE_TYPE_CODES["OR"]
+_NOT_CODE = GATE_TYPE_CODES["NOT"]
+# 不支持的门类型及输入数不为1的NOT门，输出恒为0
+_OTHER_GATE_CODE = 3
+
+# 特殊变量分析中的信号取值：常量0/1、被分析的变量及其反相，按位异或1即取反
+CONST_0 = 0
+CONST_1 = 1
+VAR = 2
+NVAR = 3
+
+# AND/OR门的(控制值, 单位元)：AND门变量与其反相相与恒为0，OR门相或恒为1
+_GATE_VALUE_RULES = {
+    _AND_CODE: (CONST_0, CONST_1),
+    _OR_CODE: (CONST_1, CONST_0),
+}
+
+# 门接收到变量及其反相时可能产生的冒险类型，其他门类型为动态冒险
+_HAZARD_TYPE_BY_CODE = {
+    _AND_CODE: "静态冒险-0",
+    _OR_CODE: "静态冒险-1",
+}
+
+# 路径缓存最多保存的门数
+PATHS_CACHE_SIZE = 1024
+
+
+@njit(cache=True)
+def _hazard_words(low, high, types, offsets, indices, outs, convergence):
+    """
+    按拓扑顺序计算变量取0和取1时各门的打包真值列，并标记汇合点处的冒险组合
+    
+    Args:
+        low: 形状为(信号数, 字数)的uint64数组，变量取0时的信号值；第0行恒0，第1行恒1
+        high: 同上，变量取1时的信号值
+        types: 门类型编码数组
+        offsets: 每个门的输入在indices中的起止偏移(CSR)
+        indices: 门输入端口对应的信号行号
+        outs: 门输出对应的信号行号
+        convergence: 门是否为汇合点
+        
+    Returns:
+        uint64数组，置位的组合在某个汇合点同时接收到原变量和反相变量
+    """
+    hazard = np.zeros(low.shape[1], dtype=np.uint64)
+    for i in range(types.shape[0]):
+        t = types[i]
+        start = offsets[i]
+        end = offsets[i + 1]
+        o = outs[i]
+        
+        if convergence[i]:
+            direct = np.zeros(low.shape[1], dtype=np.uint64)
+            negated = np.zeros(low.shape[1], dtype=np.uint64)
+            for k in range(start, end):
+                j = indices[k]
+                direct |= ~low[j] & high[j]
+                negated |= low[j] & ~high[j]
+            hazard |= direct & negated
+        
+        if t == 0:
+            low[o] = low[1]
+            high[o] = high[1]
+            for k in range(start, end):
+                low[o] &= low[indices[k]]
+                high[o] &= high[indices[k]]
+        elif t == 1:
+            low[o] = low[0]
+            high[o] = high[0]
+            for k in range(start, end):
+                low[o] |= low[indices[k]]
+                high[o] |= high[indices[k]]
+        elif t == 2:
+            low[o] = ~low[indices[start]]
+            high[o] = ~high[indices[start]]
+        else:
+            low[o] = low[0]
+            high[o] = high[0]
+    return hazard
+
+
+@njit(cache=True)
+def _output_path_mask(fanin_indptr, fanin_indices, is_input, targets):
+    """
+    标记能沿连接到达任一终点的节点
+    
+    与_find_all_paths_to_gate一致，从终点沿扇入回溯到输入为止
+    
+    Args:
+        fanin_indptr, fanin_indices: 扇入邻接表(CSR)
+        is_input: 节点是否为电路输入
+        targets: 终点节点编号
+        
+    Returns:
+        bool数组，能到达终点的节点为True
+    """
+    n = is_input.shape[0]
+    stack = np.empty(n, dtype=np.int32)
+    backward = np.zeros(n, dtype=np.bool_)
+    top = 0
+    for t in targets:
+        if not backward[t]:
+            backward[t] = True
+            stack[top] = t
+            top += 1
+    while top > 0:
+        top -= 1
+        v = stack[top]
+        if is_input[v]:
+            continue
+        for k in range(fanin_indptr[v], fanin_indptr[v + 1]):
+            w = fanin_indices[k]
+            if not backward[w]:
+                backward[w] = True
+                stack[top] = w
+                top += 1
+    return backward
+
+
+@njit(cache=True)
+def _reach_words(fanout_indptr, fanout_indices, fanin_indptr, is_input):
+    """
+    按逆拓扑顺序计算每个节点沿扇出可达的节点集合(含自身)，输入节点不向后传播
+    
+    Args:
+        fanout_indptr, fanout_indices: 扇出邻接表(CSR)
+        fanin_indptr: 扇入邻接表的偏移，用于得到各节点的入度
+        is_input: 节点是否为电路输入
+        
+    Returns:
+        形状为(节点数, ceil(节点数/64))的uint64位集，第v行第u位表示u可由v到达；
+        存在环路时返回0行数组
+    """
+    n = is_input.shape[0]
+    words = (n + 63) // 64
+    in_degree = fanin_indptr[1:] - fanin_indptr[:-1]
+    order = np.empty(n, dtype=np.int32)
+    head = 0
+    tail = 0
+    for v in range(n):
+        if in_degree[v] == 0:
+            order[tail] = v
+            tail += 1
+    while head < tail:
+        v = order[head]
+        head += 1
+        for k in range(fanout_indptr[v], fanout_indptr[v + 1]):
+            w = fanout_indices[k]
+            in_degree[w] -= 1
+            if in_degree[w] == 0:
+                order[tail] = w
+                tail += 1
+    if tail < n:
+        return np.zeros((0, words), dtype=np.uint64)
+    
+    reach = np.zeros((n, words), dtype=np.uint64)
+    for i in range(n - 1, -1, -1):
+        v = order[i]
+        if is_input[v]:
+            continue
+        reach[v, v >> 6] |= np.uint64(1) << np.uint64(v & 63)
+        for k in range(fanout_indptr[v], fanout_indptr[v + 1]):
+            w = fanout_indices[k]
+            if not is_input[w]:
+                reach[v] |= reach[w]
+    return reach
+
+
+def _csr(adjacency: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """将邻接表转换为CSR格式的(indptr, indices)数组"""
+    indptr = np.zeros(len(adjacency) + 1, dtype=np.int32)
+    indptr[1:] = np.cumsum([len(neighbors) for neighbors in adjacency])
+    indices = np.fromiter(chain.from_iterable(adjacency), dtype=np.int32, count=int(indptr[-1]))
+    return indptr, indices
+
+
+@dataclass(frozen=True, slots=True)
+class VariableAnalysis:
+    """同时以原始形式和反相形式存在的变量的分析结果"""
+    variable: str
+    id: str
+    negation_paths: List[Tuple[str, ...]]
+    original_paths: List[Tuple[str, ...]]
+    direct_not_gates: List[str]
+    has_convergence: bool
+    convergence_points: FrozenSet[str]
+    
+    def to_dict(self) -> Dict:
+        """转换为字典，供需要序列化的场合使用"""
+        return {
+            "variable": self.variable,
+            "id": self.id,
+            "negation_paths": self.negation_paths,
+            "original_paths": self.original_paths,
+            "direct_not_gates": self.direct_not_gates,
+            "has_convergence": self.has_convergence,
+            "convergence_points": list(self.convergence_points)
+        }
+
+
+class _ConnectionGraph:
+    """按整数编号表示的连接图，节点为输入、门及连接中出现的其他信号"""
+    
+    __slots__ = ('node_index', 'node_names', 'fanout_indptr', 'fanout_indices',
+                 'fanin_indptr', 'fanin_indices', 'is_input', 'output_sources')
+    
+    def __init__(self, circuit: Circuit):
+        """
+        由电路的连接构建扇入/扇出邻接表(CSR)
+        
+        Args:
+            circuit: 电路
+        """
+        node_index: Dict[str, int] = {}
+        for node in chain(circuit.inputs, circuit.gates):
+            node_index.setdefault(node, len(node_index))
+        for conn in circuit.connections:
+            node_index.setdefault(conn["from"], len(node_index))
+            node_index.setdefault(conn["to"], len(node_index))
+        for output in circuit.outputs.values():
+            node_index.setdefault(output["source"], len(node_index))
+        
+        fanout: List[List[int]] = [[] for _ in node_index]
+        fanin: List[List[int]] = [[] for _ in node_index]
+        for conn in circuit.connections:
+            from_index = node_index[conn["from"]]
+            to_index = node_index[conn["to"]]
+            fanout[from_index].append(to_index)
+            fanin[to_index].append(from_index)
+        
+        self.node_index = node_index
+        self.node_names = list(node_index)
+        self.fanout_indptr, self.fanout_indices = _csr(fanout)
+        self.fanin_indptr, self.fanin_indices = _csr(fanin)
+        self.is_input = np.zeros(len(node_index), dtype=np.bool_)
+        self.is_input[[node_index[input_id] for input_id in circuit.inputs]] = True
+        self.output_sources = np.unique(np.array(
+            [node_index[output["source"]] for output in circuit.outputs.values()], dtype=np.int32))
+
 
 class HazardDetector:
     """竞争和冒险检测器"""
@@ -14,8 +268,47 @@ class HazardDetector:
             circuit: 待检测的电路
         """
         self.circuit = circuit
-        self.paths: Dict[str, List[List[str]]] = {}  # 存储从输入到输出的所有路径
+        # 从输入到各门的所有路径，按最近使用淘汰，避免宽电路上无限增长
+        self.paths: 'OrderedDict[str, Tuple[Tuple[str, ...], ...]]' = OrderedDict()
         self.logger = logging.getLogger(__name__)
+        # 调试日志开关只在创建时判断一次，热点路径上据此跳过日志调用
+        self._debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
+        self._circuit_version = circuit.version
+
+        # 一次性建立连接索引，避免在各处反复扫描全部连接
+        self._incoming: Dict[str, List[Dict]] = {}  # 目标 -> 连接列表
+        self._outgoing: Dict[str, List[Dict]] = {}  # 来源 -> 连接列表
+        self._edge_delay: Dict[Tuple[str, str], float] = {}  # (来源, 目标) -> 连接延迟
+        for conn in circuit.connections:
+            self._incoming.setdefault(conn["to"], []).append(conn)
+            self._outgoing.setdefault(conn["from"], []).append(conn)
+            self._edge_delay.setdefault((conn["from"], conn["to"]), conn["delay"])
+
+        # 拓扑排序结果缓存，电路结构变化时由for_circuit重建检测器
+        self._topo_cache: Optional[List[str]] = None
+        self._delay_tables: Optional[Tuple[Dict[str, int], Dict[str, float], Dict[str, float]]] = None
+        self._convergence_masks: Optional[Dict[str, int]] = None
+        self._port_sources: Dict[str, Dict[str, str]] = {}
+        self._variable_paths: Dict[str, List[Tuple[str, ...]]] = {}  # 变量 -> 经过该变量的路径
+        self._graph: Optional[_ConnectionGraph] = None
+        self._reach: Optional[np.ndarray] = None
+    
+    @classmethod
+    def for_circuit(cls, circuit: Circuit) -> 'HazardDetector':
+        """
+        获取电路的检测器，同一电路在结构未变化时复用同一个检测器
+        
+        Args:
+            circuit: 待检测的电路
+            
+        Returns:
+            HazardDetector实例
+        """
+        detector = getattr(circuit, '_hazard_detector', None)
+        if detector is None or detector._circuit_version != circuit.version:
+            detector = cls(circuit)
+            circuit._hazard_detector = detector
+        return detector
         
     def detect_hazards(self) -> Dict:
         """
@@ -24,30 +317,28 @@ class HazardDetector:
         Returns:
             包含检测结果的字典
         """
-        self.logger.info(f"开始检测电路 '{self.circuit.name}' 中的竞争和冒险")
+        self.logger.info("开始检测电路 '%s' 中的竞争和冒险", self.circuit.name)
         
         try:
             race_conditions = self._detect_race_conditions()
-            self.logger.info(f"检测到 {len(race_conditions)} 个竞争条件")
+            self.logger.info("检测到 %s 个竞争条件", len(race_conditions))
         except Exception as e:
-            self.logger.error(f"检测竞争条件时出错: {str(e)}")
-            import traceback
+            self.logger.error("检测竞争条件时出错: %s", e)
             self.logger.error(traceback.format_exc())
             race_conditions = []
             
         try:
             # 首先尝试基于表达式的冒险检测
             hazards = self._detect_hazards_by_expression()
-            self.logger.info(f"通过表达式方法检测到 {len(hazards)} 个冒险")
+            self.logger.info("通过表达式方法检测到 %s 个冒险", len(hazards))
             
             # 如果未检测到冒险，尝试使用直接检测方法
             if not hazards:
                 self.logger.info("表达式方法未检测到冒险，尝试使用直接检测方法")
                 hazards = self._check_direct_hazards()
-                self.logger.info(f"通过直接检测方法检测到 {len(hazards)} 个冒险")
+                self.logger.info("通过直接检测方法检测到 %s 个冒险", len(hazards))
         except Exception as e:
-            self.logger.error(f"检测冒险时出错: {str(e)}")
-            import traceback
+            self.logger.error("检测冒险时出错: %s", e)
             self.logger.error(traceback.format_exc())
             hazards = []
             
@@ -73,20 +364,46 @@ class HazardDetector:
                 input_delays = self._calculate_input_delays(gate)
                 
                 # 检查是否存在延迟相近的输入路径
-                for i, (input1, delay1) in enumerate(input_delays.items()):
-                    for input2, delay2 in list(input_delays.items())[i+1:]:
-                        if abs(delay1 - delay2) < 0.5:  # 延迟差小于0.5ns视为可能存在竞争
-                            race_conditions.append({
-                                "gate_id": gate_id,
-                                "gate_type": gate.type,
-                                "input1": input1,
-                                "input2": input2,
-                                "delay1": delay1,
-                                "delay2": delay2
-                            })
+                items = list(input_delays.items())
+                for i, j in self._close_delay_pairs([delay for _, delay in items]):
+                    (input1, delay1), (input2, delay2) = items[i], items[j]
+                    race_conditions.append({
+                        "gate_id": gate_id,
+                        "gate_type": gate.type,
+                        "input1": input1,
+                        "input2": input2,
+                        "delay1": delay1,
+                        "delay2": delay2
+                    })
         
         return race_conditions
     
+    @staticmethod
+    def _close_delay_pairs(delays: List[float], threshold: float = 0.5) -> List[Tuple[int, int]]:
+        """
+        找出延迟差小于阈值的所有下标对
+        
+        按延迟排序后，与某个延迟相近的只可能是其后连续的一段，
+        扫描到差值达到阈值即可停止，不必两两比较。
+        
+        Args:
+            delays: 延迟列表
+            threshold: 视为可能存在竞争的延迟差上限(ns)
+            
+        Returns:
+            (i, j)下标对列表，i < j，按原列表中的先后顺序排列
+        """
+        order = sorted(range(len(delays)), key=delays.__getitem__)
+        pairs = []
+        for a, i in enumerate(order):
+            for b in range(a + 1, len(order)):
+                j = order[b]
+                if delays[j] - delays[i] >= threshold:
+                    break
+                pairs.append((i, j) if i < j else (j, i))
+        pairs.sort()
+        return pairs
+    
     def _detect_static_hazards(self) -> List[Dict]:
         """
         检测静态冒险
@@ -96,23 +413,22 @@ class HazardDetector:
         """
         hazards = []
         
+        path_counts, min_delays, max_delays = self._compute_delay_tables()
+        
         # 对每个输出检查是否存在多条路径且延迟差异较大
         for output_id, output in self.circuit.outputs.items():
             source = output["source"]
-            paths = self._find_all_paths_to_gate(source)
             
-            if len(paths) > 1:
-                # 计算每条路径的总延迟
-                path_delays = [self._calculate_path_delay(path) for path in paths]
-                
+            if path_counts.get(source, 0) > 1:
                 # 检查路径延迟差异
-                max_delay = max(path_delays)
-                min_delay = min(path_delays)
+                max_delay = max_delays[source]
+                min_delay = min_delays[source]
                 
                 if max_delay - min_delay > 1.0:  # 延迟差大于1ns视为可能存在冒险
+                    # 只有存在冒险时才需要列出具体路径
                     hazards.append({
                         "output_id": output_id,
-                        "paths": paths,
+                        "paths": [list(path) for path in self._find_all_paths_to_gate(source)],
                         "max_delay": max_delay,
                         "min_delay": min_delay
                     })
@@ -122,96 +438,127 @@ class HazardDetector:
     def _calculate_input_delays(self, gate: LogicGate) -> Dict[str, float]:
         """计算门输入的延迟"""
         delays = {}
+        max_delays = self._compute_delay_tables()[2]
         for input_id in gate.inputs:
-            try:
-                self.logger.debug(f"计算门 {gate.id} 的输入 {input_id} 的延迟")
-                paths = self._find_all_paths_to_gate(input_id)
-                if paths:
-                    delays[input_id] = max(self._calculate_path_delay(path) for path in paths)
-                    self.logger.debug(f"门 {gate.id} 的输入 {input_id} 的延迟为 {delays[input_id]}")
-                else:
-                    self.logger.warning(f"未找到到门 {gate.id} 的输入 {input_id} 的路径，设置延迟为0")
-                    delays[input_id] = 0.0
-            except Exception as e:
-                self.logger.error(f"计算门 {gate.id} 的输入 {input_id} 的延迟时出错: {str(e)}")
+            if input_id in max_delays:
+                delays[input_id] = max_delays[input_id]
+                if self._debug_enabled:
+                    self.logger.debug("门 %s 的输入 %s 的延迟为 %s", gate.id, input_id, delays[input_id])
+            else:
+                self.logger.warning("未找到到门 %s 的输入 %s 的路径，设置延迟为0", gate.id, input_id)
                 delays[input_id] = 0.0
         return delays
     
-    def _find_all_paths_to_gate(self, gate_id: str) -> List[List[str]]:
-        """查找到指定门的所有路径"""
+    def _compute_delay_tables(self) -> Tuple[Dict[str, int], Dict[str, float], Dict[str, float]]:
+        """
+        沿拓扑顺序一次计算从输入到各节点的路径数、最小和最大路径延迟
+        
+        Returns:
+            (路径数, 最小延迟, 最大延迟)三个以节点ID为键的映射，
+            没有来自输入的路径的节点不在其中
+        """
+        if self._delay_tables is not None:
+            return self._delay_tables
+        
+        gates = self.circuit.gates
+        path_counts = {input_id: 1 for input_id in self.circuit.inputs}
+        min_delays = {input_id: 0.0 for input_id in self.circuit.inputs}
+        max_delays = dict(min_delays)
+        for gate_id in self._topological_sort():
+            count = 0
+            shortest = longest = None
+            for conn in self._incoming.get(gate_id, ()):
+                from_id = conn["from"]
+                if from_id not in path_counts:
+                    continue
+                edge_delay = self._edge_delay[(from_id, gate_id)]
+                count += path_counts[from_id]
+                low = min_delays[from_id] + edge_delay
+                high = max_delays[from_id] + edge_delay
+                if shortest is None or low < shortest:
+                    shortest = low
+                if longest is None or high > longest:
+                    longest = high
+            if count:
+                gate_delay = gates[gate_id].delay
+                path_counts[gate_id] = count
+                min_delays[gate_id] = shortest + gate_delay
+                max_delays[gate_id] = longest + gate_delay
+        
+        self._delay_tables = (path_counts, min_delays, max_delays)
+        return self._delay_tables
+    
+    def _find_all_paths_to_gate(self, gate_id: str) -> Tuple[Tuple[str, ...], ...]:
+        """查找到指定门的所有路径，结果在各输出和各变量间共享，不应修改"""
         if gate_id in self.paths:
+            self.paths.move_to_end(gate_id)
             return self.paths[gate_id]
-            
-        paths = []
-        visited = set()
-        max_depth = 100  # 防止无限递归
-        
-        def dfs(current: str, path: List[str], depth: int = 0) -> None:
-            if depth > max_depth:
-                self.logger.warning(f"DFS搜索达到最大深度 {max_depth}，可能存在循环")
-                return
-                
-            if current in self.circuit.inputs:
-                paths.append(path[:])
-                return
-                
-            if current in visited:
-                return
-                
-            visited.add(current)
-            
-            # 查找连接到当前门输入的所有连接
-            for conn in self.circuit.connections:
-                if conn["to"] == current:
-                    dfs(conn["from"], [conn["from"]] + path, depth + 1)
-                    
-            visited.remove(current)
         
         try:
-            self.logger.debug(f"查找到门 {gate_id} 的所有路径")
-            dfs(gate_id, [gate_id])
+            paths = self._enumerate_paths_to_gate(gate_id)
             self.paths[gate_id] = paths
-            self.logger.debug(f"找到 {len(paths)} 条到门 {gate_id} 的路径")
+            if len(self.paths) > PATHS_CACHE_SIZE:
+                self.paths.popitem(last=False)
+            if self._debug_enabled:
+                self.logger.debug("找到 %d 条到门 %s 的路径", len(paths), gate_id)
             return paths
         except Exception as e:
-            self.logger.error(f"查找到门 {gate_id} 的路径时出错: {str(e)}")
-            import traceback
-            self.logger.error(traceback.format_exc())
-            return []
+            self.logger.error("查找到门 %s 的路径时出错: %s", gate_id, e)
+            # 环路已在拓扑排序时检查，这里的调用栈只用于调试
+            self.logger.debug(traceback.format_exc())
+            return ()
     
-    def _calculate_path_delay(self, path: List[str]) -> float:
-        """计算路径总延迟"""
-        try:
-            total_delay = 0.0
-            
-            # 计算门延迟
-            for gate_id in path:
-                if gate_id in self.circuit.gates:
-                    total_delay += self.circuit.gates[gate_id].delay
-            
-            # 计算连接延迟
-            for i in range(len(path) - 1):
-                connection_found = False
-                for conn in self.circuit.connections:
-                    if conn["from"] == path[i] and conn["to"] == path[i + 1]:
-                        total_delay += conn["delay"]
-                        connection_found = True
-                        break
-                
-                if not connection_found:
-                    self.logger.warning(f"未找到从 {path[i]} 到 {path[i+1]} 的连接")
-                    
-            self.logger.debug(f"路径 {' -> '.join(path)} 的总延迟为 {total_delay}")
-            return total_delay
-        except Exception as e:
-            self.logger.error(f"计算路径 {path} 的延迟时出错: {str(e)}")
-            import traceback
-            self.logger.error(traceback.format_exc())
-            return 0.0
+    def _enumerate_paths_to_gate(self, gate_id: str) -> Tuple[Tuple[str, ...], ...]:
+        """
+        按后序遍历扇入锥，由各前驱的路径拼接出到指定门的路径
+        
+        共享的子图只展开一次，用显式栈代替递归，不受递归深度限制
+        
+        Args:
+            gate_id: 门ID
+            
+        Returns:
+            路径元组，每条路径从输入开始、以该门结束
+        """
+        inputs = self.circuit.inputs
+        incoming = self._incoming
+        memo: Dict[str, Tuple[Tuple[str, ...], ...]] = {}  # 节点 -> 从输入到该节点的路径
+        active = set()  # 已展开前驱、尚未完成的节点，用于跳过环路
+        stack = [gate_id]
+        
+        while stack:
+            node = stack[-1]
+            if node in memo:
+                stack.pop()
+                continue
+            if node in inputs:
+                memo[node] = ((node,),)
+                stack.pop()
+                continue
+            if node not in active:
+                # 第一次访问：先处理所有前驱
+                active.add(node)
+                for conn in incoming.get(node, ()):
+                    source = conn["from"]
+                    if source not in memo and source not in active:
+                        stack.append(source)
+                continue
+            
+            # 前驱都已完成，拼接路径
+            stack.pop()
+            active.discard(node)
+            memo[node] = tuple(path + (node,)
+                               for conn in incoming.get(node, ())
+                               for path in memo.get(conn["from"], ()))
+        
+        return memo[gate_id]
     
     def _detect_hazards_by_expression(self) -> List[Dict]:
         """
-        通过从后到前遍历电路并使用特殊变量分析来检测冒险
+        使用特殊变量分析来检测冒险
+
+        先按电路结构找出变量原值和反值汇合的门，只枚举这些门扇入锥内
+        其他输入的取值组合，锥外的输入不影响汇合点处的检测结果
         
         Returns:
             冒险列表
@@ -222,164 +569,336 @@ class HazardDetector:
         inputs = list(self.circuit.inputs.keys())
         input_names = {input_id: self.circuit.inputs[input_id]["name"] for input_id in inputs}
         
-        self.logger.info(f"开始使用特殊变量方法检测电路中的冒险")
-        self.logger.info(f"电路包含以下输入: {input_names}")
+        self.logger.info("开始使用特殊变量方法检测电路中的冒险")
+        self.logger.info("电路包含以下输入: %s", input_names)
         
-        # 查找所有输入变量中存在非电路的变量
-        variables_with_negation = self._find_variables_with_negation()
+        # 电路中没有非门时任何变量都不会以反相形式出现，不需要做极性传播
+        if not self._has_not_gate():
+            self.logger.info("电路中没有非门，不存在冒险")
+            return hazards
         
-        if not variables_with_negation:
+        # 由极性传播结果直接得到原值和反值存在汇合点的变量，无需枚举路径
+        candidate_bits = 0
+        for mask in self._compute_convergence_masks().values():
+            candidate_bits |= mask
+        candidates = [input_id for i, input_id in enumerate(inputs) if candidate_bits >> i & 1]
+        
+        if not candidates:
             self.logger.info("未检测到任何变量及其反相同时存在于电路中，不存在冒险")
             return hazards
             
-        self.logger.info(f"检测到以下变量及其反相同时存在于电路中: {[var['variable'] for var in variables_with_negation]}")
+        self.logger.info("检测到以下变量及其反相同时存在于电路中: %s", [input_names[var_id] for var_id in candidates])
         
         # 对每个存在非形式的输入变量进行分析
-        for var_info in variables_with_negation:
-            variable = var_info["variable"]
-            var_id = var_info["id"]
+        for var_id in candidates:
+            variable = input_names[var_id]
             
-            self.logger.info(f"分析变量 {variable} 的冒险情况")
+            self.logger.info("分析变量 %s 的冒险情况", variable)
             
-            # 获取所有其他输入变量
-            other_inputs = [inp for inp in inputs if inp != var_id]
+            # 只有原值和反值都能到达的门才可能检测到冒险
+            convergence_points = self._find_convergence_gates(var_id)
             
-            # 生成其他输入变量的所有可能组合
-            input_combinations = self._generate_all_input_combinations(other_inputs)
+            # 只枚举汇合点扇入锥内的其他输入变量
+            cone_inputs, cone_gates = self._fanin_cone(convergence_points)
+            other_inputs = [inp for inp in cone_inputs if inp != var_id]
             
-            self.logger.info(f"为变量 {variable} 生成了 {len(input_combinations)} 种输入组合")
+            self.logger.info("变量 %s 的汇合点: %s，需要分析相关的 %s 个输入的 %s 种输入组合",
+                             variable, convergence_points, len(other_inputs), 1 << len(other_inputs))
             
-            # 分析每种输入组合下变量产生的冒险
+            # 按位并行筛选出存在冒险的输入组合，只对这些组合生成冒险信息
             hazard_found = False
-            
-            for input_combo in input_combinations:
+            convergence_set = set(convergence_points)
+            hazard_mask = self._find_hazard_combinations(var_id, other_inputs, cone_gates, convergence_set)
+            
+            # 各门的结果只取决于其扇入锥内输入的取值，在该变量的各组合间共享
+            cone_masks = self._input_cone_masks(other_inputs, cone_gates)
+            cofactor_cache: Dict[Tuple[str, int], Tuple[int, Optional[Dict]]] = {}
+            # 各组合复用同一个电路状态，每次分析都会覆盖输入和锥内所有门的值
+            circuit_state: Dict[str, int] = {}
+            
+            for index in np.flatnonzero(hazard_mask).tolist():
+                # 组合编号的第j位为第j个输入的取值
+                input_combo = {input_id: (index >> j) & 1 for j, input_id in enumerate(other_inputs)}
                 # 使用特殊变量分析冒险
-                hazard_info = self._analyze_hazard_with_special_variable(var_id, variable, input_combo)
+                hazard_info = self._analyze_hazard_with_special_variable(
+                    var_id, variable, input_combo, cone_gates, convergence_set,
+                    cone_masks=cone_masks, cofactor_cache=cofactor_cache,
+                    circuit_state=circuit_state
+                )
                 if hazard_info:
                     hazards.append(hazard_info)
                     hazard_found = True
             
             if not hazard_found:
-                self.logger.info(f"变量 {variable} 在所有输入组合下均未检测到冒险")
+                self.logger.info("变量 %s 在所有输入组合下均未检测到冒险", variable)
         
-        self.logger.info(f"冒险检测完成，共发现 {len(hazards)} 个冒险")
+        self.logger.info("冒险检测完成，共发现 %s 个冒险", len(hazards))
         return hazards
     
-    def _analyze_hazard_with_special_variable(self, var_id: str, variable_name: str, 
-                                             other_inputs: Dict[str, int]) -> Optional[Dict]:
+    def _has_not_gate(self) -> bool:
+        """电路中是否存在非门"""
+        return any(gate.type_code == _NOT_CODE for gate in self.circuit.gates.values())
+    
+    def _find_convergence_gates(self, var_id: str) -> List[str]:
         """
-        使用特殊变量分析电路中的冒险
+        找出同时接收到变量原值和反值的门
         
         Args:
             var_id: 变量ID
-            variable_name: 变量名称
-            other_inputs: 其他输入变量的值
             
         Returns:
-            冒险信息或None
+            按拓扑顺序排列的汇合点门ID列表
         """
-        # 创建用于检测冒险的特殊变量
-        special_var = SpecialVariable(var_id, variable_name)
-        
-        # 创建输入值映射，将目标变量设为特殊变量
-        input_values = other_inputs.copy()
-        input_values[var_id] = special_var
+        bit = 1 << list(self.circuit.inputs).index(var_id)
+        masks = self._compute_convergence_masks()
+        return [gate_id for gate_id in self._topological_sort() if masks.get(gate_id, 0) & bit]
+    
+    def _compute_convergence_masks(self) -> Dict[str, int]:
+        """
+        沿拓扑顺序一次传播所有输入变量原值/反值的可达位掩码
         
-        self.logger.info(f"开始分析变量 {variable_name} 在输入组合 {other_inputs} 下的冒险情况")
-        self.logger.info(f"使用特殊变量 {special_var} 替代实际输入")
+        第i位对应第i个输入变量，NOT门交换原值和反值的掩码
         
-        # 按拓扑顺序逆序列出所有门
-        sorted_gates = self._reverse_topological_sort()
-        self.logger.info(f"逆拓扑排序结果: {sorted_gates}")
+        Returns:
+            门ID到汇合位掩码的映射，置位表示该变量的原值和反值经由不同输入到达此门
+        """
+        if self._convergence_masks is not None:
+            return self._convergence_masks
+        
+        direct = {input_id: 1 << i for i, input_id in enumerate(self.circuit.inputs)}
+        negated: Dict[str, int] = {}
+        convergence_masks = {}
+        
+        for gate_id in self._topological_sort():
+            gate_direct = gate_negated = converged = 0
+            for conn in self._incoming.get(gate_id, ()):
+                edge_direct = direct.get(conn["from"], 0)
+                edge_negated = negated.get(conn["from"], 0)
+                # 原值和反值须经由不同的输入到达
+                converged |= (edge_direct & gate_negated) | (edge_negated & gate_direct)
+                gate_direct |= edge_direct
+                gate_negated |= edge_negated
+            
+            convergence_masks[gate_id] = converged
+            if self.circuit.gates[gate_id].type_code == _NOT_CODE:
+                gate_direct, gate_negated = gate_negated, gate_direct
+            direct[gate_id] = gate_direct
+            negated[gate_id] = gate_negated
+        
+        self._convergence_masks = convergence_masks
+        return convergence_masks
+    
+    def _find_hazard_combinations(self, var_id: str, other_inputs: List[str],
+                                  gate_order: List[str], convergence_points: Set[str]) -> np.ndarray:
+        """
+        按位并行计算其他输入的所有取值组合下，汇合点是否同时接收到变量的原值和反值
         
-        # 初始化电路状态，包含输入值
-        circuit_state = input_values.copy()
-        self.logger.info(f"初始电路状态: {circuit_state}")
+        每个信号用变量取0和取1时的两个值表示：(0,1)即原变量，(1,0)即反相变量，
+        与_compute_special_gate_output的特殊变量运算结果一致。所有组合打包为uint64字，
+        由_hazard_words内核按拓扑顺序逐门计算。
         
-        # 分析当前电路连接情况
-        self.logger.info("当前电路连接情况:")
-        for conn in self.circuit.connections:
-            self.logger.debug(f"  连接: {conn['from']} -> {conn['to']}")
+        Args:
+            var_id: 变量ID
+            other_inputs: 需要枚举的其他输入ID列表
+            gate_order: 需要计算的门，按拓扑顺序排列
+            convergence_points: 变量原值和反值的汇合点
+            
+        Returns:
+            长度为2^len(other_inputs)的布尔数组，第k项表示第k种组合存在冒险
+        """
+        num_combinations = 1 << len(other_inputs)
+        combination_index = np.arange(num_combinations)
+        truth_table = (combination_index[:, None] >> np.arange(len(other_inputs))) & 1
+        columns = pack_input_bits(truth_table)
+        
+        types, offsets, indices, outs, convergence = self._lower_cone(
+            var_id, other_inputs, gate_order, convergence_points
+        )
+        
+        # 信号行: 0恒0, 1恒1, 其他输入, 变量, 各门的输出
+        num_inputs = len(other_inputs)
+        low = np.zeros((num_inputs + 3 + len(gate_order), columns.shape[1]), dtype=np.uint64)
+        low[1] = ~np.uint64(0)
+        low[2:num_inputs + 2] = columns
+        high = low.copy()
+        high[num_inputs + 2] = ~np.uint64(0)
+        
+        hazard_words = _hazard_words(low, high, types, offsets, indices, outs, convergence)
+        return unpack_bits(hazard_words, num_combinations).astype(bool)
+    
+    def _lower_cone(self, var_id: str, other_inputs: List[str], gate_order: List[str],
+                    convergence_points: Set[str]) -> Tuple[np.ndarray, ...]:
+        """
+        将扇入锥中的门转换为_hazard_words使用的整数数组
         
-        # 分析汇合点（一个门接收同一个变量的原值和反值的情况）
-        convergence_points = []
-        for gate_id in sorted_gates:
+        Args:
+            var_id: 变量ID
+            other_inputs: 其他输入ID列表
+            gate_order: 锥内的门，按拓扑顺序排列
+            convergence_points: 变量原值和反值的汇合点
+            
+        Returns:
+            (门类型编码, 输入偏移, 输入信号行号, 输出信号行号, 汇合点标记)
+        """
+        # 缺少信号源或信号源没有值的端口读第0行(恒0)
+        rows = {input_id: i + 2 for i, input_id in enumerate(other_inputs)}
+        rows[var_id] = len(other_inputs) + 2
+        first_gate_row = len(other_inputs) + 3
+        rows.update((gate_id, first_gate_row + i) for i, gate_id in enumerate(gate_order))
+        
+        types = np.empty(len(gate_order), dtype=np.int8)
+        offsets = np.zeros(len(gate_order) + 1, dtype=np.int32)
+        indices = []
+        for i, gate_id in enumerate(gate_order):
             gate = self.circuit.gates[gate_id]
+            sources = self._input_port_sources(gate_id)
+            code = gate.type_code
+            if code < 0 or (code == _NOT_CODE and len(gate.inputs) != 1):
+                code = _OTHER_GATE_CODE
+            types[i] = code
+            indices.extend(rows.get(sources.get(port), 0) for port in gate.inputs)
+            offsets[i + 1] = len(indices)
+        
+        outs = np.arange(first_gate_row, first_gate_row + len(gate_order), dtype=np.int32)
+        convergence = np.array([gate_id in convergence_points for gate_id in gate_order], dtype=np.int8)
+        return types, offsets, np.array(indices, dtype=np.int32), outs, convergence
+    
+    def _input_cone_masks(self, other_inputs: List[str], gate_order: List[str]) -> Dict[str, int]:
+        """
+        计算各门扇入锥内的输入集合，以输入在other_inputs中的位置为位
+        
+        Args:
+            other_inputs: 输入ID列表
+            gate_order: 门ID列表，按拓扑顺序排列
             
-            # 查找可能的连接到此门的路径
-            paths_to_gate = self._find_all_paths_to_gate(gate_id)
-            
-            # 检查是否有路径包含目标变量和其反相
-            direct_var_paths = []
-            negated_var_paths = []
-            
-            for path in paths_to_gate:
-                if var_id in path:
-                    var_index = path.index(var_id)
-                    # 检查变量后是否紧跟着NOT门，这表示这条路径上变量被反相了
-                    if var_index + 1 < len(path):
-                        next_gate_id = path[var_index + 1]
-                        if next_gate_id in self.circuit.gates and self.circuit.gates[next_gate_id].type == "NOT":
-                            negated_var_paths.append(path)
-                        else:
-                            direct_var_paths.append(path)
+        Returns:
+            门ID到输入位掩码的映射
+        """
+        masks = {input_id: 1 << j for j, input_id in enumerate(other_inputs)}
+        for gate_id in gate_order:
+            mask = 0
+            for conn in self._incoming.get(gate_id, ()):
+                mask |= masks.get(conn["from"], 0)
+            masks[gate_id] = mask
+        return masks
+    
+    def _fanin_cone(self, gate_ids: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        计算一组门的扇入锥
+        
+        Args:
+            gate_ids: 门ID列表
+            
+        Returns:
+            (锥内的输入ID列表, 按拓扑顺序排列的锥内门ID列表)
+        """
+        cone = set()
+        stack = list(gate_ids)
+        while stack:
+            node = stack.pop()
+            if node in cone:
+                continue
+            cone.add(node)
+            for conn in self._incoming.get(node, ()):
+                stack.append(conn["from"])
+        
+        cone_inputs = [input_id for input_id in self.circuit.inputs if input_id in cone]
+        cone_gates = [gate_id for gate_id in self._topological_sort() if gate_id in cone]
+        return cone_inputs, cone_gates
+    
+    def _analyze_hazard_with_special_variable(self, var_id: str, variable_name: str, 
+                                             other_inputs: Dict[str, int],
+                                             gate_order: List[str],
+                                             convergence_points: Set[str],
+                                             cone_masks: Optional[Dict[str, int]] = None,
+                                             cofactor_cache: Optional[Dict] = None,
+                                             circuit_state: Optional[Dict[str, int]] = None) -> Optional[Dict]:
+        """
+        使用特殊变量分析电路中的冒险
+        
+        Args:
+            var_id: 变量ID
+            variable_name: 变量名称
+            other_inputs: 其他输入变量的值
+            gate_order: 需要计算的门，按拓扑顺序排列
+            convergence_points: 变量原值和反值的汇合点
+            cone_masks: 各门扇入锥内的输入在other_inputs中的位掩码，与cofactor_cache一起使用
+            cofactor_cache: 同一变量各组合间共享的缓存，(门ID, 锥内输入取值) -> (输出值, 冒险门信息)
+            circuit_state: 可复用的电路状态，输入和gate_order中各门的值会被覆盖
             
-            if direct_var_paths and negated_var_paths:
-                self.logger.info(f"门 {gate_id} 可能是变量 {variable_name} 的汇合点，同时有原始路径和非路径")
-                convergence_points.append(gate_id)
+        Returns:
+            冒险信息或None
+        """
+        # 初始化电路状态，将目标变量设为特殊变量
+        if circuit_state is None:
+            circuit_state = {}
+        circuit_state.update(other_inputs)
+        circuit_state[var_id] = VAR
+        
+        if cofactor_cache is not None:
+            # 组合编号的第j位为other_inputs中第j个输入的取值
+            combination = sum(1 << j for j, value in enumerate(other_inputs.values()) if value)
         
-        self.logger.info(f"找到的汇合点: {convergence_points}")
+        debug = self._debug_enabled
+        if debug:
+            self.logger.debug("开始分析变量 %s 在输入组合 %s 下的冒险情况", variable_name, other_inputs)
         
         # 初始化检测到的冒险
         hazard_gates = []
         
-        # 从输出门向输入门遍历电路
-        for gate_id in sorted_gates:
+        # 按拓扑顺序计算，门的输入在计算前都已得到
+        for gate_id in gate_order:
+            if cofactor_cache is not None:
+                key = (gate_id, combination & cone_masks[gate_id])
+                cached = cofactor_cache.get(key)
+                if cached is not None:
+                    circuit_state[gate_id], hazard_entry = cached
+                    if hazard_entry is not None:
+                        hazard_gates.append(dict(hazard_entry))
+                    continue
+            
             gate = self.circuit.gates[gate_id]
+            hazard_entry = None
             
             # 收集门的输入值
             gate_inputs = self._collect_gate_inputs(gate_id, circuit_state)
-            self.logger.info(f"门 {gate_id}({gate.type}) 的输入值: {gate_inputs}")
-            
-            # 检查门输入是否包含互补信号（变量及其反相）
-            hazard_detected = self._check_gate_for_hazard(gate_id, gate, gate_inputs)
-            if hazard_detected:
-                self.logger.info(f"在门 {gate_id} 检测到冒险: {hazard_detected}")
-                hazard_gates.append({
-                    "gate_id": gate_id,
-                    "gate_type": gate.type,
-                    "inputs": gate.inputs,
-                    "hazard_type": hazard_detected["type"],
-                    "critical": True,
-                    "description": hazard_detected["description"]
-                })
-            else:
-                self.logger.info(f"门 {gate_id} 未检测到冒险")
+            if debug:
+                self.logger.debug("门 %s(%s) 的输入值: %s", gate_id, gate.type, gate_inputs)
+            
+            # 只有汇合点可能同时接收到互补信号（变量及其反相）
+            if gate_id in convergence_points:
+                hazard_detected = self._check_gate_for_hazard(gate_id, gate, gate_inputs, var_id)
+                if hazard_detected:
+                    if debug:
+                        self.logger.debug("在门 %s 检测到冒险: %s", gate_id, hazard_detected)
+                    hazard_entry = {
+                        "gate_id": gate_id,
+                        "gate_type": gate.type,
+                        "inputs": gate.inputs,
+                        "hazard_type": hazard_detected["type"],
+                        "critical": True,
+                        "description": hazard_detected["description"]
+                    }
+                    hazard_gates.append(dict(hazard_entry))
+                elif debug:
+                    self.logger.debug("门 %s 未检测到冒险", gate_id)
             
             # 计算门的输出，可能包含特殊变量
             output_value = self._compute_special_gate_output(gate, gate_inputs)
             circuit_state[gate_id] = output_value
-            self.logger.info(f"门 {gate_id} 的输出值: {output_value}")
-        
-        self.logger.info(f"电路最终状态: {circuit_state}")
+            if debug:
+                self.logger.debug("门 %s 的输出值: %s", gate_id, output_value)
+            if cofactor_cache is not None:
+                cofactor_cache[key] = (output_value, hazard_entry)
         
-        # 增加对汇合点的额外检查
-        if convergence_points and not hazard_gates:
-            self.logger.warning(f"找到了汇合点 {convergence_points}，但未检测到冒险，可能是门输入值收集有问题")
-            
-            # 详细检查每个汇合点
-            for gate_id in convergence_points:
-                gate = self.circuit.gates[gate_id]
-                self.logger.warning(f"汇合点 {gate_id} ({gate.type}) 的输入端口: {gate.inputs}")
-                
-                # 检查连接
-                connections_to_gate = [conn for conn in self.circuit.connections if conn["to"] == gate_id]
-                self.logger.warning(f"连接到汇合点 {gate_id} 的连接: {connections_to_gate}")
+        if debug:
+            self.logger.debug("电路最终状态: %s", circuit_state)
         
         # 如果检测到冒险，返回冒险信息
         if hazard_gates:
             hazard_type = hazard_gates[0]["hazard_type"]  # 使用第一个检测到的冒险类型
-            self.logger.info(f"变量 {variable_name} 在输入组合 {other_inputs} 下存在 {hazard_type} 冒险")
+            if debug:
+                self.logger.debug("变量 %s 在输入组合 %s 下存在 %s 冒险", variable_name, other_inputs, hazard_type)
             
             return {
                 "variable": variable_name,
@@ -389,21 +908,10 @@ class HazardDetector:
                 "description": f"变量 {variable_name} 可能导致 {hazard_type}，因为存在互补输入的门"
             }
         
-        self.logger.info(f"变量 {variable_name} 在输入组合 {other_inputs} 下未检测到冒险")
+        if debug:
+            self.logger.debug("变量 %s 在输入组合 %s 下未检测到冒险", variable_name, other_inputs)
         return None
     
-    def _reverse_topological_sort(self) -> List[str]:
-        """
-        电路拓扑排序的逆序，从输出到输入
-        
-        Returns:
-            逆拓扑排序的门ID列表
-        """
-        # 获取正向拓扑排序
-        forward_sort = self._topological_sort()
-        # 反转顺序
-        return list(reversed(forward_sort))
-    
     def _topological_sort(self) -> List[str]:
         """
         对电路中的门进行拓扑排序，确保计算顺序正确
@@ -411,25 +919,30 @@ class HazardDetector:
         Returns:
             排序后的门ID列表
         """
+        if self._topo_cache is not None:
+            return self._topo_cache
+
         # 构建邻接表
         graph = {gate_id: [] for gate_id in self.circuit.gates}
         in_degree = {gate_id: 0 for gate_id in self.circuit.gates}
         
         # 计算入度和建立邻接关系
-        for conn in self.circuit.connections:
-            from_id, to_id = conn["from"], conn["to"]
-            
+        for from_id, conns in self._outgoing.items():
             # 只考虑门之间的连接
-            if from_id in self.circuit.gates and to_id in self.circuit.gates:
-                graph[from_id].append(to_id)
-                in_degree[to_id] += 1
+            if from_id not in self.circuit.gates:
+                continue
+            for conn in conns:
+                to_id = conn["to"]
+                if to_id in self.circuit.gates:
+                    graph[from_id].append(to_id)
+                    in_degree[to_id] += 1
         
         # 拓扑排序
-        queue = [gate_id for gate_id, degree in in_degree.items() if degree == 0]
+        queue = deque(gate_id for gate_id, degree in in_degree.items() if degree == 0)
         sorted_gates = []
         
         while queue:
-            gate_id = queue.pop(0)
+            gate_id = queue.popleft()
             sorted_gates.append(gate_id)
             
             for neighbor in graph[gate_id]:
@@ -441,6 +954,7 @@ class HazardDetector:
         if len(sorted_gates) != len(self.circuit.gates):
             raise ValueError("电路中存在环路，无法进行拓扑排序")
             
+        self._topo_cache = sorted_gates
         return sorted_gates
     
     def _collect_gate_inputs(self, gate_id: str, circuit_state: Dict) -> Dict:
@@ -456,52 +970,80 @@ class HazardDetector:
         """
         gate = self.circuit.gates[gate_id]
         gate_inputs = {}
+        debug = self._debug_enabled
         
-        self.logger.debug(f"为门 {gate_id} 收集输入值，输入端口列表: {gate.inputs}")
-        
-        # 分析所有连接到此门的连接
-        connections_to_gate = [conn for conn in self.circuit.connections if conn["to"] == gate_id]
-        self.logger.debug(f"连接到门 {gate_id} 的连接数量: {len(connections_to_gate)}")
-        for conn in connections_to_gate:
-            self.logger.debug(f"  连接: {conn['from']} -> {gate_id}")
+        # 门输入端口到信号来源的映射
+        input_port_to_source = self._input_port_sources(gate_id)
         
-        # 创建门输入端口到信号来源的映射
-        input_port_to_source = {}
-        for conn in self.circuit.connections:
-            if conn["to"] == gate_id:
-                # 找出这个连接对应门的哪个输入端口
-                for i, input_port in enumerate(gate.inputs):
-                    if input_port not in input_port_to_source:  # 如果这个端口还没有分配信号源
-                        input_port_to_source[input_port] = conn["from"]
-                        break
-        
-        self.logger.debug(f"门 {gate_id} 的输入端口到信号源映射: {input_port_to_source}")
+        if debug:
+            self.logger.debug("为门 %s 收集输入值，输入端口列表: %s，连接数量: %d，输入端口到信号源映射: %s",
+                              gate_id, gate.inputs, len(self._incoming.get(gate_id, ())), input_port_to_source)
         
         # 如果输入端口映射不完整，这可能是问题所在
         if len(input_port_to_source) != len(gate.inputs):
-            self.logger.warning(f"门 {gate_id} 的输入端口映射不完整 - 预期 {len(gate.inputs)} 个输入，但只找到 {len(input_port_to_source)} 个")
+            self.logger.warning("门 %s 的输入端口映射不完整 - 预期 %s 个输入，但只找到 %s 个",
+                                gate_id, len(gate.inputs), len(input_port_to_source))
             missing_ports = [port for port in gate.inputs if port not in input_port_to_source]
-            self.logger.warning(f"门 {gate_id} 的缺失输入端口: {missing_ports}")
+            self.logger.warning("门 %s 的缺失输入端口: %s", gate_id, missing_ports)
         
         # 根据映射关系获取输入值
         for input_port, source_id in input_port_to_source.items():
             if source_id in circuit_state:
                 gate_inputs[input_port] = circuit_state[source_id]
-                self.logger.debug(f"门 {gate_id} 的输入端口 {input_port} 值为 {circuit_state[source_id]}，来源于 {source_id}")
+                if debug:
+                    self.logger.debug("门 %s 的输入端口 %s 值为 %s，来源于 %s",
+                                      gate_id, input_port, circuit_state[source_id], source_id)
             else:
                 # 如果找不到源，使用默认值0
                 gate_inputs[input_port] = 0
-                self.logger.warning(f"门 {gate_id} 的输入端口 {input_port} 找不到源 {source_id} 的值，使用默认值0")
+                self.logger.warning("门 %s 的输入端口 %s 找不到源 %s 的值，使用默认值0", gate_id, input_port, source_id)
         
         # 检查是否所有输入端口都有值
         if len(gate_inputs) != len(gate.inputs):
-            self.logger.warning(f"门 {gate_id} 的输入不完整 - 预期 {len(gate.inputs)} 个输入，但只有 {len(gate_inputs)} 个")
+            self.logger.warning("门 %s 的输入不完整 - 预期 %s 个输入，但只有 %s 个",
+                                gate_id, len(gate.inputs), len(gate_inputs))
             missing_inputs = [port for port in gate.inputs if port not in gate_inputs]
-            self.logger.warning(f"门 {gate_id} 的缺失输入: {missing_inputs}")
+            self.logger.warning("门 %s 的缺失输入: %s", gate_id, missing_inputs)
         
         return gate_inputs
     
-    def _check_gate_for_hazard(self, gate_id: str, gate: 'LogicGate', gate_inputs: Dict) -> Optional[Dict]:
+    def _input_port_sources(self, gate_id: str) -> Dict[str, str]:
+        """
+        为门的输入端口分配信号来源
+        
+        门的输入端口以信号源ID命名，来源与端口同名的连接直接绑定到该端口；
+        其余连接按连接顺序分配给尚未绑定的端口。结果按门ID缓存。
+        
+        Args:
+            gate_id: 门ID
+            
+        Returns:
+            输入端口到信号源ID的映射，按端口顺序排列
+        """
+        cached = self._port_sources.get(gate_id)
+        if cached is not None:
+            return cached
+        
+        ports = list(dict.fromkeys(self.circuit.gates[gate_id].inputs))
+        port_set = set(ports)
+        bound = {}
+        unmatched = []
+        for conn in self._incoming.get(gate_id, ()):
+            source = conn["from"]
+            if source in port_set and source not in bound:
+                bound[source] = source
+            else:
+                unmatched.append(source)
+        
+        free_ports = [port for port in ports if port not in bound]
+        bound.update(zip(free_ports, unmatched))
+        
+        input_port_to_source = {port: bound[port] for port in ports if port in bound}
+        self._port_sources[gate_id] = input_port_to_source
+        return input_port_to_source
+    
+    def _check_gate_for_hazard(self, gate_id: str, gate: 'LogicGate', gate_inputs: Dict,
+                               var_id: str) -> Optional[Dict]:
         """
         检查门是否存在冒险（接收到变量及其反相）
         
@@ -509,354 +1051,236 @@ class HazardDetector:
             gate_id: 门ID
             gate: 门对象
             gate_inputs: 门的输入值
+            var_id: 被分析的变量ID
             
         Returns:
             冒险信息或None
         """
         # 如果门只有一个输入，不可能有冒险
         if len(gate.inputs) < 2:
-            self.logger.debug(f"门 {gate_id} 只有一个输入，跳过冒险检测")
             return None
         
         # 检查是否存在变量及其反相同时作为输入
-        special_vars = {}  # 变量ID -> 输入端口列表
-        negated_vars = {}  # 变量ID -> 输入端口列表
-        
-        self.logger.debug(f"分析门 {gate_id} 的输入是否包含变量及其反相")
-        
-        for input_port, value in gate_inputs.items():
-            # 如果是特殊变量
-            if isinstance(value, SpecialVariable):
-                var_id = value.var_id
-                if var_id not in special_vars:
-                    special_vars[var_id] = []
-                special_vars[var_id].append(input_port)
-                self.logger.debug(f"门 {gate_id} 的输入端口 {input_port} 包含特殊变量 {value}")
-            # 如果是特殊变量的反相
-            elif isinstance(value, NegatedVariable):
-                var_id = value.var_id
-                if var_id not in negated_vars:
-                    negated_vars[var_id] = []
-                negated_vars[var_id].append(input_port)
-                self.logger.debug(f"门 {gate_id} 的输入端口 {input_port} 包含反相变量 {value}")
-            else:
-                self.logger.debug(f"门 {gate_id} 的输入端口 {input_port} 包含常规值 {value}")
-        
-        self.logger.debug(f"门 {gate_id} 的特殊变量: {special_vars}")
-        self.logger.debug(f"门 {gate_id} 的反相变量: {negated_vars}")
-        
-        # 检查是否同时存在变量和其反相
-        for var_id in special_vars:
-            if var_id in negated_vars:
-                # 确定冒险类型
-                hazard_type = ""
-                if gate.type == "AND":
-                    hazard_type = "静态冒险-0"
-                    description = f"门 {gate_id} (AND) 同时接收到变量 {var_id} 及其反相，可能产生静态冒险-0"
-                elif gate.type == "OR":
-                    hazard_type = "静态冒险-1"
-                    description = f"门 {gate_id} (OR) 同时接收到变量 {var_id} 及其反相，可能产生静态冒险-1"
-                else:
-                    hazard_type = "动态冒险"
-                    description = f"门 {gate_id} ({gate.type}) 同时接收到变量 {var_id} 及其反相，可能产生动态冒险"
-                
-                self.logger.info(f"门 {gate_id} 同时接收到变量 {var_id} 及其反相，检测到 {hazard_type}")
-                
-                return {
-                    "type": hazard_type,
-                    "description": description,
-                    "variable_id": var_id,
-                    "special_var_ports": special_vars[var_id],
-                    "negated_var_ports": negated_vars[var_id]
-                }
+        special_var_ports = [port for port, value in gate_inputs.items() if value == VAR]
+        negated_var_ports = [port for port, value in gate_inputs.items() if value == NVAR]
         
-        return None
+        if self._debug_enabled:
+            self.logger.debug("门 %s 的特殊变量端口: %s，反相变量端口: %s",
+                              gate_id, special_var_ports, negated_var_ports)
+        
+        if not special_var_ports or not negated_var_ports:
+            return None
+        
+        # 确定冒险类型
+        hazard_type = _HAZARD_TYPE_BY_CODE.get(gate.type_code, "动态冒险")
+        description = f"门 {gate_id} ({gate.type}) 同时接收到变量 {var_id} 及其反相，可能产生{hazard_type}"
+        
+        if self._debug_enabled:
+            self.logger.debug("门 %s 同时接收到变量 %s 及其反相，检测到 %s", gate_id, var_id, hazard_type)
+        
+        return {
+            "type": hazard_type,
+            "description": description,
+            "variable_id": var_id,
+            "special_var_ports": special_var_ports,
+            "negated_var_ports": negated_var_ports
+        }
     
-    def _compute_special_gate_output(self, gate: 'LogicGate', gate_inputs: Dict) -> Any:
+    def _compute_special_gate_output(self, gate: 'LogicGate', gate_inputs: Dict) -> int:
         """
         计算门的输出，处理特殊变量
         
         Args:
             gate: 门对象
-            gate_inputs: 门的输入值
+            gate_inputs: 门的输入值，取CONST_0/CONST_1/VAR/NVAR
             
         Returns:
-            门的输出值，可能是常规值或特殊变量
+            门的输出值，取CONST_0/CONST_1/VAR/NVAR
         """
-        # NOT门处理
-        if gate.type == "NOT":
+        code = gate.type_code
+        
+        # NOT门处理：常量取反，变量与其反相互换
+        if code == _NOT_CODE:
             if len(gate.inputs) != 1:
-                self.logger.warning(f"NOT门应该只有一个输入，但有 {len(gate.inputs)} 个")
-                return 0
-                
-            input_port = gate.inputs[0]
-            input_value = gate_inputs.get(input_port, 0)
-            
-            # 如果输入是特殊变量，输出其反相
-            if isinstance(input_value, SpecialVariable):
-                self.logger.debug(f"NOT门 {gate.id} 输入为特殊变量 {input_value}，输出为其反相")
-                return NegatedVariable(input_value.var_id, input_value.var_name)
-            # 如果输入是特殊变量的反相，输出原变量
-            elif isinstance(input_value, NegatedVariable):
-                self.logger.debug(f"NOT门 {gate.id} 输入为反相变量 {input_value}，输出为原变量")
-                return SpecialVariable(input_value.var_id, input_value.var_name)
-            # 常规值取反
-            else:
-                self.logger.debug(f"NOT门 {gate.id} 输入为常规值 {input_value}，输出为 {1 - input_value}")
-                return 1 - input_value
-        
-        # AND门处理
-        elif gate.type == "AND":
-            self.logger.debug(f"处理AND门 {gate.id} 的输出计算")
-            # 检查是否有常规0输入，有则直接返回0
-            for input_port in gate.inputs:
-                input_value = gate_inputs.get(input_port, 0)
-                if isinstance(input_value, (int, float)) and input_value == 0:
-                    self.logger.debug(f"AND门 {gate.id} 有常规0输入，直接返回0")
-                    return 0
-            
-            # 收集特殊变量和其反相
-            special_vars = {}
-            negated_vars = {}
-            
-            for input_port in gate.inputs:
-                input_value = gate_inputs.get(input_port, 0)
-                if isinstance(input_value, SpecialVariable):
-                    special_vars[input_value.var_id] = input_value
-                    self.logger.debug(f"AND门 {gate.id} 的输入端口 {input_port} 包含特殊变量 {input_value}")
-                elif isinstance(input_value, NegatedVariable):
-                    negated_vars[input_value.var_id] = input_value
-                    self.logger.debug(f"AND门 {gate.id} 的输入端口 {input_port} 包含反相变量 {input_value}")
-            
-            self.logger.debug(f"AND门 {gate.id} 的特殊变量: {special_vars}")
-            self.logger.debug(f"AND门 {gate.id} 的反相变量: {negated_vars}")
-            
-            # 检查是否存在变量和其反相，存在则输出为0（冒险情况）
-            for var_id in special_vars:
-                if var_id in negated_vars:
-                    self.logger.info(f"AND门 {gate.id} 同时接收到变量 {var_id} 及其反相，输出必为0（冒险情况）")
-                    return 0  # AND门同时接收变量和其反相，输出必为0
-            
-            # 如果所有输入都是1，输出特殊变量（如果有）或1
-            all_regular_inputs_are_1 = all(isinstance(gate_inputs.get(port, 0), (int, float)) and gate_inputs.get(port, 0) == 1 
-                  for port in gate.inputs if port in gate_inputs 
-                  and not isinstance(gate_inputs.get(port), (SpecialVariable, NegatedVariable)))
-            
-            self.logger.debug(f"AND门 {gate.id} 的常规输入是否全为1: {all_regular_inputs_are_1}")
-            
-            if all_regular_inputs_are_1:
-                # 如果只有一个特殊变量，输出该变量
-                if len(special_vars) == 1 and not negated_vars:
-                    output = list(special_vars.values())[0]
-                    self.logger.debug(f"AND门 {gate.id} 只有一个特殊变量且常规输入全为1，输出该特殊变量: {output}")
-                    return output
-                # 如果只有一个反相变量，输出该反相
-                elif len(negated_vars) == 1 and not special_vars:
-                    output = list(negated_vars.values())[0]
-                    self.logger.debug(f"AND门 {gate.id} 只有一个反相变量且常规输入全为1，输出该反相变量: {output}")
-                    return output
-                # 如果没有特殊变量，输出1
-                elif not special_vars and not negated_vars:
-                    self.logger.debug(f"AND门 {gate.id} 没有特殊变量且常规输入全为1，输出1")
-                    return 1
-                # 多个特殊变量的情况，作为冒险处理
-                else:
-                    self.logger.info(f"AND门 {gate.id} 有多个特殊变量 {special_vars} 或同时有特殊变量和反相变量，简化处理为0")
-                    return 0  # 简化处理，多个特殊变量情况下输出0
-            
-            # 其他情况输出0
-            self.logger.debug(f"AND门 {gate.id} 默认情况，输出0")
-            return 0
-            
-        # OR门处理
-        elif gate.type == "OR":
-            self.logger.debug(f"处理OR门 {gate.id} 的输出计算")
-            # 检查是否有常规1输入，有则直接返回1
-            for input_port in gate.inputs:
-                input_value = gate_inputs.get(input_port, 0)
-                if isinstance(input_value, (int, float)) and input_value == 1:
-                    self.logger.debug(f"OR门 {gate.id} 有常规1输入，直接返回1")
-                    return 1
-            
-            # 收集特殊变量和其反相
-            special_vars = {}
-            negated_vars = {}
-            
-            for input_port in gate.inputs:
-                input_value = gate_inputs.get(input_port, 0)
-                if isinstance(input_value, SpecialVariable):
-                    special_vars[input_value.var_id] = input_value
-                    self.logger.debug(f"OR门 {gate.id} 的输入端口 {input_port} 包含特殊变量 {input_value}")
-                elif isinstance(input_value, NegatedVariable):
-                    negated_vars[input_value.var_id] = input_value
-                    self.logger.debug(f"OR门 {gate.id} 的输入端口 {input_port} 包含反相变量 {input_value}")
-            
-            self.logger.debug(f"OR门 {gate.id} 的特殊变量: {special_vars}")
-            self.logger.debug(f"OR门 {gate.id} 的反相变量: {negated_vars}")
-            
-            # 检查是否存在变量和其反相，存在则输出为1（冒险情况）
-            for var_id in special_vars:
-                if var_id in negated_vars:
-                    self.logger.info(f"OR门 {gate.id} 同时接收到变量 {var_id} 及其反相，输出必为1（冒险情况）")
-                    return 1  # OR门同时接收变量和其反相，输出必为1
-            
-            # 如果所有输入都是0，输出特殊变量（如果有）或0
-            all_regular_inputs_are_0 = all(isinstance(gate_inputs.get(port, 0), (int, float)) and gate_inputs.get(port, 0) == 0 
-                  for port in gate.inputs if port in gate_inputs 
-                  and not isinstance(gate_inputs.get(port), (SpecialVariable, NegatedVariable)))
-            
-            self.logger.debug(f"OR门 {gate.id} 的常规输入是否全为0: {all_regular_inputs_are_0}")
-            
-            if all_regular_inputs_are_0:
-                # 如果只有一个特殊变量，输出该变量
-                if len(special_vars) == 1 and not negated_vars:
-                    output = list(special_vars.values())[0]
-                    self.logger.debug(f"OR门 {gate.id} 只有一个特殊变量且常规输入全为0，输出该特殊变量: {output}")
-                    return output
-                # 如果只有一个反相变量，输出该反相
-                elif len(negated_vars) == 1 and not special_vars:
-                    output = list(negated_vars.values())[0]
-                    self.logger.debug(f"OR门 {gate.id} 只有一个反相变量且常规输入全为0，输出该反相变量: {output}")
-                    return output
-                # 如果没有特殊变量，输出0
-                elif not special_vars and not negated_vars:
-                    self.logger.debug(f"OR门 {gate.id} 没有特殊变量且常规输入全为0，输出0")
-                    return 0
-                # 多个特殊变量的情况，作为冒险处理
-                else:
-                    self.logger.info(f"OR门 {gate.id} 有多个特殊变量 {special_vars} 或同时有特殊变量和反相变量，简化处理为1")
-                    return 1  # 简化处理，多个特殊变量情况下输出1
-            
-            # 其他情况输出1
-            self.logger.debug(f"OR门 {gate.id} 默认情况，输出1")
-            return 1
-            
-        # 其他类型的门，返回默认值0
+                self.logger.warning("NOT门应该只有一个输入，但有 %s 个", len(gate.inputs))
+                return CONST_0
+            return gate_inputs.get(gate.inputs[0], CONST_0) ^ 1
+        
+        rule = _GATE_VALUE_RULES.get(code)
+        if rule is None:
+            self.logger.warning("不支持的门类型: %s", gate.type)
+            return CONST_0
+        controlling, identity = rule
+        
+        values = {gate_inputs.get(port, CONST_0) for port in gate.inputs}
+        if controlling in values or (VAR in values and NVAR in values):
+            output = controlling
+        elif VAR in values:
+            output = VAR
+        elif NVAR in values:
+            output = NVAR
         else:
-            self.logger.warning(f"不支持的门类型: {gate.type}")
-            return 0
+            output = identity
+        
+        if self._debug_enabled:
+            self.logger.debug("%s门 %s 的输入值 %s，输出为 %s", gate.type, gate.id, values, output)
+        return output
     
-    def _generate_all_input_combinations(self, input_ids: List[str]) -> List[Dict[str, int]]:
+    def _compile_graph(self) -> _ConnectionGraph:
+        """获取整数编号的连接图，首次使用时构建"""
+        if self._graph is None:
+            self._graph = _ConnectionGraph(self.circuit)
+        return self._graph
+    
+    def _reach_table(self) -> np.ndarray:
         """
-        生成所有可能的输入组合
+        计算各节点沿扇出可达、且能到达输出的节点位集，在所有变量间共享
         
-        Args:
-            input_ids: 输入ID列表
-            
         Returns:
-            所有可能的输入组合列表
+            形状为(节点数, 字数)的uint64位集，按_compile_graph的节点编号排列
         """
-        if not input_ids:
-            return [{}]  # 无输入时返回空字典
-            
-        # 生成所有可能的01组合
-        combinations = []
-        total_combinations = 2 ** len(input_ids)
+        if self._reach is not None:
+            return self._reach
+        
+        graph = self._compile_graph()
+        reach = _reach_words(graph.fanout_indptr, graph.fanout_indices, graph.fanin_indptr, graph.is_input)
+        if len(graph.node_names) and not len(reach):
+            raise ValueError("电路中存在环路，无法计算可达性")
+        
+        # 只保留能到达输出的节点，其余节点不会出现在任何路径上
+        on_output_path = _output_path_mask(graph.fanin_indptr, graph.fanin_indices,
+                                           graph.is_input, graph.output_sources)
+        reach &= pack_input_bits(on_output_path[:, None])[0]
+        self._reach = reach
+        return reach
+    
+    def _path_nodes(self, sources: List[str]) -> np.ndarray:
+        """
+        计算从给定起点出发到达任一输出的路径上的节点
         
-        for i in range(total_combinations):
-            combination = {}
-            for j, input_id in enumerate(input_ids):
-                # 将i的二进制表示转换为输入值
-                bit_value = (i >> j) & 1
-                combination[input_id] = bit_value
-            combinations.append(combination)
+        Args:
+            sources: 起点节点ID列表
             
-        return combinations
+        Returns:
+            uint64位集，按_compile_graph的节点编号标记路径上的节点
+        """
+        node_index = self._compile_graph().node_index
+        rows = self._reach_table()[[node_index[node] for node in sources]]
+        return np.bitwise_or.reduce(rows, axis=0)
     
-    def _find_variables_with_negation(self) -> List[Dict]:
+    def _find_variables_with_negation(self) -> List[VariableAnalysis]:
         """查找在电路中同时以原始形式和反相形式存在的变量"""
-        result = []
+        result = list(self._iter_variables_with_negation())
+        
+        self.logger.info("找到 %s 个存在反相形式的变量", len(result))
+        if self.logger.isEnabledFor(logging.INFO):
+            for var_info in result:
+                self.logger.info("变量 %s 可能导致冒险，汇合点: %s", var_info.variable, var_info.convergence_points)
         
+        return result
+    
+    def _iter_variables_with_negation(self) -> Iterator[VariableAnalysis]:
+        """逐个生成同时以原始形式和反相形式存在的变量，调用方可以边查找边处理"""
         self.logger.info("开始查找同时存在变量及其反相的情况")
         
+        if not self._has_not_gate():
+            return
+        
+        gates = self.circuit.gates
+        debug = self._debug_enabled
+        info = self.logger.isEnabledFor(logging.INFO)
+        
         # 检查每个输入变量
         for input_id, input_data in self.circuit.inputs.items():
             variable_name = input_data["name"]
             
-            self.logger.info(f"分析变量: {variable_name} (ID: {input_id})")
+            if info:
+                self.logger.info("分析变量: %s (ID: %s)", variable_name, input_id)
             
             # 查找直接连接到该变量的所有门，检查是否有NOT门
             direct_not_gates = []
             
-            # 打印所有连接情况，帮助调试
-            self.logger.debug(f"变量 {variable_name} 的所有连接:")
-            for conn in self.circuit.connections:
-                if conn["from"] == input_id:
-                    to_id = conn["to"]
-                    to_type = "门" if to_id in self.circuit.gates else "未知"
-                    if to_id in self.circuit.gates:
-                        to_type = self.circuit.gates[to_id].type
-                    self.logger.debug(f"  连接: {input_id} -> {to_id} (类型: {to_type})")
-                    
-                    if to_id in self.circuit.gates and self.circuit.gates[to_id].type == "NOT":
-                        direct_not_gates.append(to_id)
-                        self.logger.info(f"找到变量 {variable_name} 的直接非门: {to_id} (类型: {self.circuit.gates[to_id].type})")
+            # 从扇出索引中只取该变量的连接，打印连接情况帮助调试
+            if debug:
+                self.logger.debug("变量 %s 的所有连接:", variable_name)
+            for conn in self._outgoing.get(input_id, ()):
+                to_id = conn["to"]
+                gate = gates.get(to_id)
+                if debug:
+                    self.logger.debug("  连接: %s -> %s (类型: %s)", input_id, to_id,
+                                      gate.type if gate is not None else "未知")
+                
+                if gate is not None and gate.type_code == _NOT_CODE:
+                    direct_not_gates.append(to_id)
+                    if info:
+                        self.logger.info("找到变量 %s 的直接非门: %s (类型: %s)", variable_name, to_id, gate.type)
             
-            self.logger.info(f"变量 {variable_name} 的直接非门数量: {len(direct_not_gates)}")
+            if info:
+                self.logger.info("变量 %s 的直接非门数量: %s", variable_name, len(direct_not_gates))
             
             # 只要存在非门，就认为可能有冒险
             if direct_not_gates:
-                self.logger.info(f"变量 {variable_name} 存在非形式，可能导致冒险")
+                if info:
+                    self.logger.info("变量 %s 存在非形式，可能导致冒险", variable_name)
                 
                 # 查找此变量经过的所有路径
                 var_paths = self._find_variable_paths(input_id)
                 
-                # 分离原始路径和非路径
+                # 分离原始路径和非路径，按集合判断下一个门是否为直接非门
                 original_paths = []
                 negation_paths = []
+                not_set = frozenset(direct_not_gates)
                 
+                # 变量总在路径开头，下一个节点即path[1]
                 for path in var_paths:
-                    var_index = path.index(input_id) if input_id in path else -1
-                    if var_index != -1 and var_index < len(path) - 1:
-                        next_gate_id = path[var_index + 1]
-                        if next_gate_id in direct_not_gates:
+                    next_gate_id = path[1] if len(path) > 1 else None
+                    if next_gate_id is not None:
+                        if next_gate_id in not_set:
                             negation_paths.append(path)
-                            self.logger.debug(f"变量 {variable_name} 的非路径: {path}")
                         else:
                             original_paths.append(path)
-                            self.logger.debug(f"变量 {variable_name} 的原始路径: {path}")
                 
-                self.logger.info(f"变量 {variable_name} 的原始路径数量: {len(original_paths)}, 非路径数量: {len(negation_paths)}")
+                if info:
+                    self.logger.info("变量 %s 的原始路径数量: %s, 非路径数量: %s",
+                                     variable_name, len(original_paths), len(negation_paths))
                 
                 # 检查是否有路径最终汇合到同一个门，这是冒险的必要条件
-                has_convergence = False
-                convergence_points = set()
+                common_gates = frozenset()
                 
-                # 检查原始路径和非路径是否有相同的门
-                original_gates = set([gate_id for path in original_paths for gate_id in path])
-                negation_gates = set([gate_id for path in negation_paths for gate_id in path])
-                
-                # 计算交集，排除变量本身和直接的非门
-                exclude_gates = set([input_id] + direct_not_gates)
-                common_gates = original_gates.intersection(negation_gates) - exclude_gates
+                # 只有一侧存在路径时不可能汇合，不必计算可达集合
+                if original_paths and negation_paths:
+                    # 原始路径和非路径经过的门分别是从非NOT后继和直接非门出发、
+                    # 能到达输出的节点，由共享的可达位集按位或得到，不必展开路径
+                    successors = [conn["to"] for conn in self._outgoing.get(input_id, ())]
+                    original_mask = self._path_nodes([to_id for to_id in successors if to_id not in not_set])
+                    negation_mask = self._path_nodes(direct_not_gates)
+                    
+                    # 按位与求交集，排除变量本身和直接的非门
+                    node_names = self._compile_graph().node_names
+                    common_bits = unpack_bits(original_mask & negation_mask, len(node_names))
+                    exclude_gates = {input_id, *direct_not_gates}
+                    common_gates = frozenset(node_names[i] for i in np.flatnonzero(common_bits).tolist()
+                                             if node_names[i] not in exclude_gates)
                 
                 if common_gates:
-                    has_convergence = True
-                    convergence_points = common_gates
-                    self.logger.info(f"变量 {variable_name} 的原始路径和非路径在以下门汇合: {common_gates}")
-                else:
-                    self.logger.info(f"变量 {variable_name} 的原始路径和非路径没有汇合点，可能不会导致冒险")
+                    if info:
+                        self.logger.info("变量 %s 的原始路径和非路径在以下门汇合: %s", variable_name, common_gates)
+                elif info:
+                    self.logger.info("变量 %s 的原始路径和非路径没有汇合点，可能不会导致冒险", variable_name)
                 
-                result.append({
-                    "variable": variable_name,
-                    "id": input_id,
-                    "negation_paths": negation_paths,
-                    "original_paths": original_paths,
-                    "direct_not_gates": direct_not_gates,
-                    "has_convergence": has_convergence,
-                    "convergence_points": list(convergence_points)
-                })
-            else:
-                self.logger.info(f"变量 {variable_name} 在电路中没有非形式，不会导致冒险")
-        
-        self.logger.info(f"找到 {len(result)} 个存在反相形式的变量")
-        if result:
-            for var_info in result:
-                self.logger.info(f"变量 {var_info['variable']} 可能导致冒险，汇合点: {var_info.get('convergence_points', [])}")
-        
-        return result
+                yield VariableAnalysis(
+                    variable=variable_name,
+                    id=input_id,
+                    negation_paths=negation_paths,
+                    original_paths=original_paths,
+                    direct_not_gates=direct_not_gates,
+                    has_convergence=bool(common_gates),
+                    convergence_points=common_gates
+                )
+            elif info:
+                self.logger.info("变量 %s 在电路中没有非形式，不会导致冒险", variable_name)
     
-    def _find_variable_paths(self, var_id: str) -> List[List[str]]:
+    def _find_variable_paths(self, var_id: str) -> List[Tuple[str, ...]]:
         """
         查找一个变量在电路中的所有路径
         
@@ -864,27 +1288,32 @@ class HazardDetector:
             var_id: 变量ID
             
         Returns:
-            包含变量的所有路径
+            以该变量开头的所有路径
         """
+        if var_id in self._variable_paths:
+            return self._variable_paths[var_id]
+        
         all_paths = []
+        debug = self._debug_enabled
         
-        self.logger.debug(f"查找变量 {var_id} 在电路中的所有路径")
+        if debug:
+            self.logger.debug("查找变量 %s 在电路中的所有路径", var_id)
         
         # 查找从变量出发的所有路径
         for output_id in self.circuit.outputs:
             source_id = self.circuit.outputs[output_id]["source"]
-            self.logger.debug(f"查找从变量 {var_id} 到输出 {output_id}(源: {source_id}) 的路径")
+            if debug:
+                self.logger.debug("查找从变量 %s 到输出 %s(源: %s) 的路径", var_id, output_id, source_id)
             
             all_output_paths = self._find_all_paths_to_gate(source_id)
             
-            # 筛选包含目标变量的路径
-            for path in all_output_paths:
-                if var_id in path:
-                    all_paths.append(path)
-                    self.logger.debug(f"找到包含变量 {var_id} 的路径: {path}")
+            # 路径回溯到输入即停止，输入只会出现在路径开头
+            all_paths.extend(path for path in all_output_paths if path[0] == var_id)
         
-        self.logger.info(f"变量 {var_id} 在电路中的总路径数: {len(all_paths)}")
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("变量 %s 在电路中的总路径数: %s", var_id, len(all_paths))
         
+        self._variable_paths[var_id] = all_paths
         return all_paths
 
     def _check_direct_hazards(self) -> List[Dict]:
@@ -897,49 +1326,38 @@ class HazardDetector:
         hazards = []
         self.logger.info("开始直接检测冒险方法")
         
-        # 查找存在反相的变量
-        variables_with_negation = self._find_variables_with_negation()
+        info = self.logger.isEnabledFor(logging.INFO)
+        gates = self.circuit.gates
+        found = False
         
-        if not variables_with_negation:
-            self.logger.info("未检测到任何变量及其反相同时存在于电路中，不存在冒险")
-            return hazards
-        
-        # 对每个变量分析其汇合点
-        for var_info in variables_with_negation:
-            variable = var_info["variable"]
-            var_id = var_info["id"]
+        # 查找存在反相的变量，每找到一个就直接分析其汇合点，不再单独遍历一遍
+        for var_info in self._iter_variables_with_negation():
+            found = True
+            variable = var_info.variable
             
-            self.logger.info(f"直接分析变量 {variable} 的冒险情况")
+            if info:
+                self.logger.info("直接分析变量 %s 的冒险情况", variable)
             
             # 如果没有汇合点，跳过
-            if not var_info.get("has_convergence", False) or not var_info.get("convergence_points"):
-                self.logger.info(f"变量 {variable} 没有汇合点，跳过")
+            if not var_info.has_convergence or not var_info.convergence_points:
+                if info:
+                    self.logger.info("变量 %s 没有汇合点，跳过", variable)
                 continue
             
             # 分析每个汇合点
-            for gate_id in var_info.get("convergence_points", []):
-                if gate_id not in self.circuit.gates:
-                    self.logger.warning(f"汇合点 {gate_id} 不是有效的门ID，跳过")
+            for gate_id in var_info.convergence_points:
+                gate = gates.get(gate_id)
+                if gate is None:
+                    self.logger.warning("汇合点 %s 不是有效的门ID，跳过", gate_id)
                     continue
-                    
-                gate = self.circuit.gates[gate_id]
-                gate_type = gate.type
-                
-                # 确定冒险类型
-                hazard_type = None
-                description = None
                 
-                if gate_type == "AND":
-                    hazard_type = "静态冒险-0"
-                    description = f"门 {gate_id} (AND) 可能同时接收到变量 {variable} 及其反相，可能产生静态冒险-0"
-                elif gate_type == "OR":
-                    hazard_type = "静态冒险-1"
-                    description = f"门 {gate_id} (OR) 可能同时接收到变量 {variable} 及其反相，可能产生静态冒险-1"
-                else:
-                    hazard_type = "动态冒险"
-                    description = f"门 {gate_id} ({gate_type}) 可能同时接收到变量 {variable} 及其反相，可能产生动态冒险"
+                # 按门类型编码确定冒险类型
+                gate_type = gate.type
+                hazard_type = _HAZARD_TYPE_BY_CODE.get(gate.type_code, "动态冒险")
+                description = f"门 {gate_id} ({gate_type}) 可能同时接收到变量 {variable} 及其反相，可能产生{hazard_type}"
                 
-                self.logger.info(f"在汇合点 {gate_id} ({gate_type}) 检测到变量 {variable} 的 {hazard_type}")
+                if info:
+                    self.logger.info("在汇合点 %s (%s) 检测到变量 %s 的 %s", gate_id, gate_type, variable, hazard_type)
                 
                 # 添加冒险信息
                 hazard_gates = [{
@@ -958,31 +1376,9 @@ class HazardDetector:
                     "description": f"变量 {variable} 可能导致 {hazard_type}，因为存在互补输入的门"
                 })
         
-        self.logger.info(f"直接检测到 {len(hazards)} 个冒险")
-        return hazards
-
-class SpecialVariable:
-    """表示特殊变量的类，用于冒险检测"""
-    
-    def __init__(self, var_id: str, var_name: str):
-        self.var_id = var_id
-        self.var_name = var_name
-        
-    def __str__(self):
-        return f"X({self.var_name})"
-        
-    def __repr__(self):
-        return self.__str__()
-
-class NegatedVariable:
-    """表示特殊变量的反相的类，用于冒险检测"""
-    
-    def __init__(self, var_id: str, var_name: str):
-        self.var_id = var_id
-        self.var_name = var_name
-        
-    def __str__(self):
-        return f"~X({self.var_name})"
+        if not found:
+            self.logger.info("未检测到任何变量及其反相同时存在于电路中，不存在冒险")
+            return hazards
         
-    def __repr__(self):
-        return self.__str__() 
\ No newline at end of file
+        self.logger.info("直接检测到 %s 个冒险", len(hazards))
+        return hazards
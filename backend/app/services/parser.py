@@ -1,7 +1,24 @@
+from collections import OrderedDict
 from typing import Dict, List, Tuple
 from app.models.circuit import Circuit, LogicGate
 from app.utils.exceptions import CircuitParseError
 import logging
+import re
+import threading
+
+# 标记为单个操作符或括号，或由非空白、非操作符字符组成的操作数
+_TOKEN_RE = re.compile(r'[&|!()]|[^&|!()\s]+')
+
+# 操作符优先级，括号不在表中
+_PREC = {'!': 3, '&': 2, '|': 1}
+
+# 二元操作符
+_BINOPS = frozenset('&|')
+
+# 按表达式缓存的解析结果，相同表达式返回同一个电路实例
+PARSE_CACHE_SIZE = 1024
+_PARSE_CACHE: 'OrderedDict[str, Circuit]' = OrderedDict()
+_PARSE_LOCK = threading.Lock()
 
 class CircuitParser:
     """电路解析器类"""
@@ -19,6 +36,8 @@ class CircuitParser:
         """
         解析逻辑表达式并生成电路
         
+        相同表达式的解析结果会被缓存并共享，调用方不应修改返回的电路
+        
         Args:
             expression: 逻辑表达式(如 "A AND B OR C")
             
@@ -27,38 +46,65 @@ class CircuitParser:
         """
         if not expression:
             raise CircuitParseError("表达式不能为空")
+        
+        with _PARSE_LOCK:
+            cached = _PARSE_CACHE.get(expression)
+            if cached is not None:
+                _PARSE_CACHE.move_to_end(expression)
+        if cached is not None:
+            self.logger.info("表达式 '%s' 命中解析缓存", expression)
+            return cached
+        
+        circuit = self._parse_expression(expression)
+        with _PARSE_LOCK:
+            _PARSE_CACHE[expression] = circuit
+            if len(_PARSE_CACHE) > PARSE_CACHE_SIZE:
+                _PARSE_CACHE.popitem(last=False)
+        return circuit
+    
+    def _parse_expression(self, expression: str) -> Circuit:
+        """
+        解析逻辑表达式并生成新的电路，门编号从g1开始
+        
+        Args:
+            expression: 逻辑表达式
             
-        self.logger.info(f"开始解析表达式: '{expression}'")
+        Returns:
+            Circuit: 解析后的电路实例
+        """
+        # 缓存的结果不能依赖解析器之前的状态
+        self.gate_id_counter = 0
+        self.logger.info("开始解析表达式: '%s'", expression)
             
         # 将表达式转换为标记列表
         tokens = self._tokenize(expression)
-        self.logger.info(f"标记化结果: {tokens}")
+        self.logger.info("标记化结果: %s", tokens)
         
         # 创建新电路
         circuit = Circuit("parsed_circuit")
         
         # 解析输入变量
         inputs = self._extract_inputs(tokens)
-        self.logger.info(f"提取的输入变量: {inputs}")
+        self.logger.info("提取的输入变量: %s", inputs)
         
         for var in inputs:
             circuit.add_input(var.lower(), var, 0)
         
         # 构建门电路
         output_id = self._build_gates(circuit, tokens)
-        self.logger.info(f"构建完成，输出门ID: {output_id}")
+        self.logger.info("构建完成，输出门ID: %s", output_id)
         
         # 添加输出端口
         circuit.add_output("out1", "Y", output_id)
         
         # 打印电路结构
-        self.logger.info(f"解析后的电路包含 {len(circuit.gates)} 个门:")
+        self.logger.info("解析后的电路包含 %s 个门:", len(circuit.gates))
         for gate_id, gate in circuit.gates.items():
-            self.logger.info(f"门 {gate_id}: 类型={gate.type}, 输入={gate.inputs}")
+            self.logger.info("门 %s: 类型=%s, 输入=%s", gate_id, gate.type, gate.inputs)
         
-        self.logger.info(f"电路连接数量: {len(circuit.connections)}")
+        self.logger.info("电路连接数量: %s", len(circuit.connections))
         for conn in circuit.connections:
-            self.logger.info(f"连接: {conn['from']} -> {conn['to']}")
+            self.logger.info("连接: %s -> %s", conn['from'], conn['to'])
         
         return circuit
     
@@ -74,29 +120,10 @@ class CircuitParser:
         """
         # 替换操作符为标准格式
         expr = expression.upper().replace('AND', '&').replace('OR', '|').replace('NOT', '!')
-        self.logger.debug(f"替换标准操作符: '{expr}'")
+        self.logger.debug("替换标准操作符: '%s'", expr)
         
         # 分割标记
-        tokens = []
-        current = ''
-        
-        for char in expr:
-            if char in '&|!()':
-                if current:
-                    tokens.append(current.strip())
-                    current = ''
-                tokens.append(char)
-            elif char.isspace():
-                if current:
-                    tokens.append(current.strip())
-                    current = ''
-            else:
-                current += char
-                
-        if current:
-            tokens.append(current.strip())
-            
-        return tokens
+        return _TOKEN_RE.findall(expr)
     
     def _extract_inputs(self, tokens: List[str]) -> List[str]:
         """
@@ -108,11 +135,8 @@ class CircuitParser:
         Returns:
             输入变量列表
         """
-        inputs = set()
-        for token in tokens:
-            if token.isalpha() and token not in ['AND', 'OR', 'NOT']:
-                inputs.add(token)
-        return sorted(list(inputs))
+        # 操作符在标记化时已替换为符号，标识符即为输入变量
+        return sorted({token for token in tokens if token.isidentifier()})
     
     def _build_gates(self, circuit: Circuit, tokens: List[str]) -> str:
         """
@@ -131,12 +155,15 @@ class CircuitParser:
         
         stack = []
         operators = []
+        # 循环内用到的方法和表绑定为局部变量
+        create_gate = self._create_gate
+        prec = _PREC.get
         
         for token in tokens:
-            if token in ['&', '|']:
-                while (operators and operators[-1] != '(' and 
-                       self._precedence(operators[-1]) >= self._precedence(token)):
-                    self._create_gate(circuit, operators.pop(), stack)
+            if token in _BINOPS:
+                token_prec = _PREC[token]
+                while operators and prec(operators[-1], 0) >= token_prec:
+                    create_gate(circuit, operators.pop(), stack)
                 operators.append(token)
             elif token == '!':
                 operators.append(token)
@@ -144,7 +171,7 @@ class CircuitParser:
                 operators.append(token)
             elif token == ')':
                 while operators and operators[-1] != '(':
-                    self._create_gate(circuit, operators.pop(), stack)
+                    create_gate(circuit, operators.pop(), stack)
                 if operators and operators[-1] == '(':
                     operators.pop()
             else:  # 操作数
@@ -152,19 +179,13 @@ class CircuitParser:
         
         # 处理剩余的操作符
         while operators:
-            self._create_gate(circuit, operators.pop(), stack)
+            create_gate(circuit, operators.pop(), stack)
         
         return stack[-1]
     
     def _precedence(self, operator: str) -> int:
         """返回操作符优先级"""
-        if operator == '!':
-            return 3
-        elif operator == '&':
-            return 2
-        elif operator == '|':
-            return 1
-        return 0
+        return _PREC.get(operator, 0)
     
     def _create_gate(self, circuit: Circuit, operator: str, stack: List[str]) -> None:
         """
@@ -176,7 +197,7 @@ class CircuitParser:
             stack: 操作数栈
         """
         gate_id = self._generate_gate_id()
-        self.logger.debug(f"创建门 {gate_id}, 操作符: {operator}, 当前栈: {stack}")
+        self.logger.debug("创建门 %s, 操作符: %s, 当前栈: %s", gate_id, operator, stack)
         
         if operator == '!':
             input_id = stack.pop()
@@ -185,7 +206,7 @@ class CircuitParser:
             circuit.add_gate(gate)
             circuit.add_connection(input_id, gate_id, 0.1)
             stack.append(gate_id)
-            self.logger.info(f"创建NOT门 {gate_id}, 输入: {input_id}")
+            self.logger.info("创建NOT门 %s, 输入: %s", gate_id, input_id)
         else:
             input2 = stack.pop()
             input1 = stack.pop()
@@ -195,4 +216,4 @@ class CircuitParser:
             circuit.add_connection(input1, gate_id, 0.1)
             circuit.add_connection(input2, gate_id, 0.1)
             stack.append(gate_id)
-            self.logger.info(f"创建{gate_type}门 {gate_id}, 输入: {input1}, {input2}") 
\ No newline at end of file
+            self.logger.info("创建%s门 %s, 输入: %s, %s", gate_type, gate_id, input1, input2) 
\ No newline at end of file
@@ -0,0 +1,72 @@
+from typing import Any, Dict, List, Optional
+from flask import Response, make_response
+from flask.json.provider import JSONProvider
+import msgspec
+import orjson
+
+# orjson原生支持datetime，非字符串键按字符串输出
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+class OrjsonProvider(JSONProvider):
+    """基于orjson的Flask JSON提供器"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """将对象编码为JSON字符串"""
+        return orjson.dumps(obj, option=ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        """将JSON字符串或字节解码为对象"""
+        return orjson.loads(s)
+
+
+def output_json(data: Any, code: int, headers: Optional[Dict] = None):
+    """flask-restx的JSON响应表示，使用orjson编码"""
+    resp = make_response(orjson.dumps(data, option=ORJSON_OPTIONS) + b"\n", code)
+    resp.headers.extend(headers or {})
+    return resp
+
+
+class GateOut(msgspec.Struct):
+    """解析响应中的逻辑门"""
+    id: str
+    type: str
+    delay: float
+
+
+class InputPort(msgspec.Struct):
+    """解析响应中的输入端口"""
+    name: str
+    initial_value: int
+
+
+class OutputPort(msgspec.Struct):
+    """解析响应中的输出端口"""
+    name: str
+    source: str
+
+
+class CircuitOut(msgspec.Struct):
+    """解析响应中的电路"""
+    id: int
+    name: str
+    expression: str
+    inputs: Dict[str, InputPort]
+    outputs: Dict[str, OutputPort]
+    gates: List[GateOut]
+    connections: List[Dict[str, Any]]
+
+
+class ParseResponse(msgspec.Struct):
+    """电路解析响应"""
+    status: str
+    circuit: CircuitOut
+
+
+_msgspec_encoder = msgspec.json.Encoder()
+
+
+def msgspec_response(payload: msgspec.Struct, code: int = 200) -> Response:
+    """将msgspec结构体直接编码为JSON响应，不经过中间字典"""
+    return Response(_msgspec_encoder.encode(payload), status=code,
+                    mimetype="application/json")
@@ -11,13 +11,27 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///app.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # 连接池配置: 连接前探活，定期回收，放大池容量应对突发请求
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': 20,
+        'max_overflow': 40,
+        'pool_pre_ping': True,
+        'pool_recycle': 1800
+    }
     
     # 跨域配置
     CORS_HEADERS = 'Content-Type'
+    
+    # 日志级别
+    LOG_LEVEL = os.environ.get('LOG_LEVEL') or 'INFO'
+    
+    # 后台检测任务的工作线程数
+    DETECTION_WORKERS = int(os.environ.get('DETECTION_WORKERS') or 4)
 
 class DevelopmentConfig(Config):
     """开发环境配置"""
     DEBUG = True
+    LOG_LEVEL = os.environ.get('LOG_LEVEL') or 'DEBUG'
     # 开发环境可以使用内存数据库加速开发
     # SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
 
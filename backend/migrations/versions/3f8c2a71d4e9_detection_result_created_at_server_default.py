@@ -0,0 +1,34 @@
+"""detection result created_at server default
+
+Revision ID: 3f8c2a71d4e9
+Revises: 56af915ce6c2
+Create Date: 2026-10-15 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f8c2a71d4e9'
+down_revision = '56af915ce6c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('detection_results') as batch_op:
+        batch_op.alter_column('created_at',
+               existing_type=sa.DateTime(),
+               type_=sa.DateTime(timezone=True),
+               server_default=sa.func.now(),
+               existing_nullable=True)
+
+
+def downgrade():
+    with op.batch_alter_table('detection_results') as batch_op:
+        batch_op.alter_column('created_at',
+               existing_type=sa.DateTime(timezone=True),
+               type_=sa.DateTime(),
+               server_default=None,
+               existing_nullable=True)
@@ -0,0 +1,30 @@
+"""add circuit lookup indexes
+
+Revision ID: 8b1d4e6f2a90
+Revises: 3f8c2a71d4e9
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1d4e6f2a90'
+down_revision = '3f8c2a71d4e9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_gate_circuit_gateid', 'gates', ['circuit_id', 'gate_id'], unique=False)
+    op.create_index('ix_connection_circuit_from', 'connections', ['circuit_id', 'from_id'], unique=False)
+    op.create_index('ix_connection_circuit_to', 'connections', ['circuit_id', 'to_id'], unique=False)
+    op.create_index('ix_detection_result_circuit_type', 'detection_results', ['circuit_id', 'result_type'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_detection_result_circuit_type', table_name='detection_results')
+    op.drop_index('ix_connection_circuit_to', table_name='connections')
+    op.drop_index('ix_connection_circuit_from', table_name='connections')
+    op.drop_index('ix_gate_circuit_gateid', table_name='gates')
@@ -0,0 +1,83 @@
+"""connection endpoints as nets
+
+Revision ID: c5e27a9d3f14
+Revises: 8b1d4e6f2a90
+Create Date: 2026-10-15 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e27a9d3f14'
+down_revision = '8b1d4e6f2a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('nets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('circuit_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.ForeignKeyConstraint(['circuit_id'], ['circuits.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('circuit_id', 'name', name='uq_net_circuit_name')
+    )
+
+    with op.batch_alter_table('connections') as batch_op:
+        batch_op.add_column(sa.Column('from_net_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('to_net_id', sa.Integer(), nullable=True))
+
+    # 将已有连接的端点名称迁移为线网
+    op.execute(
+        "INSERT INTO nets (circuit_id, name) "
+        "SELECT circuit_id, from_id FROM connections "
+        "UNION SELECT circuit_id, to_id FROM connections"
+    )
+    op.execute(
+        "UPDATE connections SET "
+        "from_net_id = (SELECT nets.id FROM nets WHERE nets.circuit_id = connections.circuit_id "
+        "AND nets.name = connections.from_id), "
+        "to_net_id = (SELECT nets.id FROM nets WHERE nets.circuit_id = connections.circuit_id "
+        "AND nets.name = connections.to_id)"
+    )
+
+    op.drop_index('ix_connection_circuit_from', table_name='connections')
+    op.drop_index('ix_connection_circuit_to', table_name='connections')
+    with op.batch_alter_table('connections') as batch_op:
+        batch_op.alter_column('from_net_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('to_net_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key('fk_connection_from_net', 'nets', ['from_net_id'], ['id'])
+        batch_op.create_foreign_key('fk_connection_to_net', 'nets', ['to_net_id'], ['id'])
+        batch_op.drop_column('from_id')
+        batch_op.drop_column('to_id')
+    op.create_index('ix_connection_circuit_from', 'connections', ['circuit_id', 'from_net_id'], unique=False)
+    op.create_index('ix_connection_circuit_to', 'connections', ['circuit_id', 'to_net_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('connections') as batch_op:
+        batch_op.add_column(sa.Column('from_id', sa.String(length=50), nullable=True))
+        batch_op.add_column(sa.Column('to_id', sa.String(length=50), nullable=True))
+
+    op.execute(
+        "UPDATE connections SET "
+        "from_id = (SELECT nets.name FROM nets WHERE nets.id = connections.from_net_id), "
+        "to_id = (SELECT nets.name FROM nets WHERE nets.id = connections.to_net_id)"
+    )
+
+    op.drop_index('ix_connection_circuit_from', table_name='connections')
+    op.drop_index('ix_connection_circuit_to', table_name='connections')
+    with op.batch_alter_table('connections') as batch_op:
+        batch_op.alter_column('from_id', existing_type=sa.String(length=50), nullable=False)
+        batch_op.alter_column('to_id', existing_type=sa.String(length=50), nullable=False)
+        batch_op.drop_constraint('fk_connection_from_net', type_='foreignkey')
+        batch_op.drop_constraint('fk_connection_to_net', type_='foreignkey')
+        batch_op.drop_column('from_net_id')
+        batch_op.drop_column('to_net_id')
+    op.create_index('ix_connection_circuit_from', 'connections', ['circuit_id', 'from_id'], unique=False)
+    op.create_index('ix_connection_circuit_to', 'connections', ['circuit_id', 'to_id'], unique=False)
+
+    op.drop_table('nets')
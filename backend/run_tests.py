@@ -1,14 +1,26 @@
+import sys
 import unittest
 
+try:
+    import xdist  # noqa: F401
+except ImportError:  # 未安装pytest-xdist时按顺序运行
+    xdist = None
+
 def run_tests():
     """运行所有测试"""
+    # 安装了pytest-xdist时按CPU核数并行运行
+    if xdist is not None:
+        import pytest
+        return pytest.main(['-n', 'auto', 'tests'])
+    
     # 发现并运行所有测试
     test_loader = unittest.TestLoader()
     test_suite = test_loader.discover('tests')
     
     # 运行测试
     runner = unittest.TextTestRunner(verbosity=2)
-    runner.run(test_suite)
+    result = runner.run(test_suite)
+    return 0 if result.wasSuccessful() else 1
 
 if __name__ == '__main__':
-    run_tests() 
\ No newline at end of file
+    sys.exit(run_tests())
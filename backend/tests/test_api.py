@@ -1,18 +1,28 @@
 import unittest
 import json
-from app import create_app
+import time
+from app import create_app, db
 from config import Config
 
 class TestConfig(Config):
     TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
 
 class TestAPI(unittest.TestCase):
     """测试API端点"""
     
     def setUp(self):
         self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
         self.client = self.app.test_client()
     
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
     def test_parse_circuit(self):
         """测试电路解析API"""
         response = self.client.post('/api/parse',
@@ -65,4 +75,53 @@ class TestAPI(unittest.TestCase):
         # 验证错误处理
         response = self.client.post('/api/detect',
             json={"wrong_key": {}})
-        self.assertEqual(response.status_code, 400) 
\ No newline at end of file
+        self.assertEqual(response.status_code, 400) 
+    
+    def test_detection_job(self):
+        """测试后台检测任务API"""
+        circuit_data = {
+            "circuit": {
+                "name": "job_test",
+                "gates": [
+                    {"id": "g1", "type": "NOT", "delay": 1.0,
+                     "inputs": ["a"], "output": "g1"},
+                    {"id": "g2", "type": "OR", "delay": 2.0,
+                     "inputs": ["a", "g1"], "output": "g2"}
+                ],
+                "inputs": [{"id": "a", "name": "A", "initial_value": 0}],
+                "outputs": [{"id": "out1", "name": "Y", "source": "g2"}],
+                "connections": [
+                    {"from": "a", "to": "g1", "delay": 0.1},
+                    {"from": "a", "to": "g2", "delay": 0.1},
+                    {"from": "g1", "to": "g2", "delay": 0.1}
+                ]
+            }
+        }
+        
+        response = self.client.post('/api/detect/jobs', json=circuit_data)
+        self.assertEqual(response.status_code, 202)
+        job_id = json.loads(response.data)["job_id"]
+        
+        # 轮询直到任务结束
+        deadline = time.time() + 10
+        while True:
+            response = self.client.get(f'/api/detect/jobs/{job_id}')
+            self.assertEqual(response.status_code, 200)
+            job = json.loads(response.data)
+            if job["status"] not in ("pending", "running") or time.time() > deadline:
+                break
+            time.sleep(0.01)
+        
+        self.assertEqual(job["status"], "success")
+        self.assertIn("hazards", job["results"])
+        self.assertGreater(len(job["results"]["hazards"]), 0)
+        
+        # 验证错误处理
+        response = self.client.post('/api/detect/jobs', json={"wrong_key": {}})
+        self.assertEqual(response.status_code, 400)
+        for body in ('null', '[]', '"x"', '{"circuit": null}', '{"circuit": []}'):
+            response = self.client.post('/api/detect/jobs', data=body,
+                                        content_type='application/json')
+            self.assertEqual(response.status_code, 400, body)
+        response = self.client.get('/api/detect/jobs/unknown')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,162 @@
+import itertools
+import random
+import unittest
+import numpy as np
+from app.models.circuit import Circuit, LogicGate
+
+class TestCircuit(unittest.TestCase):
+    """测试电路模型计算"""
+
+    def setUp(self):
+        # 创建测试电路: Y = (A AND B) OR NOT C
+        self.circuit = Circuit("test_circuit")
+
+        self.circuit.add_input("a", "A", 0)
+        self.circuit.add_input("b", "B", 0)
+        self.circuit.add_input("c", "C", 0)
+
+        self.circuit.add_gate(LogicGate("g1", "AND", 2.0, ["a", "b"], "g1"))
+        self.circuit.add_gate(LogicGate("g2", "NOT", 1.0, ["c"], "g2"))
+        self.circuit.add_gate(LogicGate("g3", "OR", 2.0, ["g1", "g2"], "g3"))
+
+        self.circuit.add_connection("a", "g1", 0.1)
+        self.circuit.add_connection("b", "g1", 0.1)
+        self.circuit.add_connection("c", "g2", 0.1)
+        self.circuit.add_connection("g1", "g3", 0.1)
+        self.circuit.add_connection("g2", "g3", 0.1)
+
+        self.circuit.add_output("out1", "Y", "g3")
+
+    def test_compute_circuit_batch_matches_scalar(self):
+        """测试批量计算与逐组计算结果一致"""
+        # 重复真值表使组数跨越多个uint64字
+        rows = list(itertools.product([0, 1], repeat=3)) * 20
+        results = self.circuit.compute_circuit_batch(np.array(rows))
+
+        for k, row in enumerate(rows):
+            expected = self.circuit.compute_circuit(dict(zip(["a", "b", "c"], row)))
+            for key, value in expected.items():
+                self.assertEqual(results[key][k], value)
+
+    def test_compute_circuit_batch_single_row(self):
+        """测试单组输入的批量计算"""
+        results = self.circuit.compute_circuit_batch(np.array([[1, 1, 1]]))
+        self.assertEqual(results["out1"].tolist(), [1])
+
+    def test_compute_circuit_batch_shape_check(self):
+        """测试输入矩阵列数不匹配时报错"""
+        with self.assertRaises(ValueError):
+            self.circuit.compute_circuit_batch(np.zeros((4, 2), dtype=np.uint8))
+
+    def test_sorted_gates_invalidated_on_change(self):
+        """测试拓扑排序缓存在电路修改后失效"""
+        self.assertEqual(self.circuit.compute_circuit({"a": 1, "b": 1, "c": 1})["out1"], 1)
+
+        # 在输出前追加一个NOT门，缓存的排序必须重建
+        self.circuit.add_gate(LogicGate("g4", "NOT", 1.0, ["g3"], "g4"))
+        self.circuit.add_connection("g3", "g4", 0.1)
+        self.circuit.add_output("out1", "Y", "g4")
+        self.assertEqual(self.circuit.compute_circuit({"a": 1, "b": 1, "c": 1})["out1"], 0)
+
+    def test_compiled_kernel_matches_gate_outputs(self):
+        """测试结构数组内核的结果与逐门计算一致"""
+        rng = random.Random(0)
+        circuit = Circuit("large_circuit")
+        nets = []
+        for i in range(6):
+            circuit.add_input(f"i{i}", f"I{i}", 0)
+            nets.append(f"i{i}")
+        for g in range(128):
+            gate_type = rng.choice(["AND", "OR", "NOT"])
+            inputs = [rng.choice(nets)] if gate_type == "NOT" else rng.sample(nets, 3)
+            circuit.add_gate(LogicGate(f"g{g}", gate_type, 1.0, inputs, f"g{g}"))
+            for input_id in inputs:
+                circuit.add_connection(input_id, f"g{g}", 0.1)
+            nets.append(f"g{g}")
+        circuit.add_output("out1", "Y", nets[-1])
+
+        for row in itertools.product([0, 1], repeat=6):
+            input_values = dict(zip(nets[:6], row))
+            results = circuit.compute_circuit(input_values)
+
+            # 按门的添加顺序(已满足拓扑顺序)逐门计算作为参照
+            expected = dict(input_values)
+            for gate in circuit.gates.values():
+                expected[gate.id] = gate.compute_output(expected)
+            expected["out1"] = expected[nets[-1]]
+            self.assertEqual(results, expected)
+
+    def test_eval_cache_returns_copies(self):
+        """测试重复输入命中缓存且返回结果互不影响"""
+        first = self.circuit.compute_circuit({"a": 1, "b": 0, "c": 1})
+        first["out1"] = 99
+        second = self.circuit.compute_circuit({"a": 1, "b": 0, "c": 1})
+        self.assertEqual(second["out1"], 0)
+        self.assertEqual(len(self.circuit._eval_cache), 1)
+
+    def test_compute_circuit_from_vector(self):
+        """测试按输入向量计算与按字典计算一致"""
+        values = self.circuit.compute_circuit_from_vector(np.array([1, 1, 1], dtype=np.int8))
+        net_index = self.circuit.compile().net_id_to_index
+        self.assertEqual(values[net_index["g1"]], 1)
+        self.assertEqual(values[net_index["g2"]], 0)
+        self.assertEqual(values[net_index["g3"]], 1)
+
+        with self.assertRaises(ValueError):
+            self.circuit.compute_circuit_from_vector([1, 1])
+
+    def test_gate_missing_input(self):
+        """测试逻辑门缺少输入值时报错"""
+        with self.assertRaises(ValueError) as ctx:
+            self.circuit.gates["g1"].compute_output({"a": 1})
+        self.assertEqual(str(ctx.exception), "输入 b 没有值")
+
+    def test_compiled_shared_between_identical_circuits(self):
+        """测试结构相同的电路共享编译结果"""
+        other = Circuit("copy")
+        for input_id, data in self.circuit.inputs.items():
+            other.add_input(input_id, data["name"], data["initial_value"])
+        for gate in self.circuit.gates.values():
+            other.add_gate(LogicGate(gate.id, gate.type, gate.delay, list(gate.inputs), gate.output))
+        for conn in self.circuit.connections:
+            other.add_connection(conn["from"], conn["to"], conn["delay"])
+
+        self.assertIs(other.compile(), self.circuit.compile())
+
+        # 结构变化后不再共享
+        other.add_gate(LogicGate("g4", "NOT", 1.0, ["g3"], "g4"))
+        other.add_connection("g3", "g4", 0.1)
+        self.assertIsNot(other.compile(), self.circuit.compile())
+
+    def test_outputs_from_gates_and_inputs(self):
+        """测试以门和输入端口为来源的输出都写入结果"""
+        self.circuit.add_output("out2", "A_copy", "a")
+        results = self.circuit.compute_circuit({"a": 1, "b": 0, "c": 0})
+        self.assertEqual(results["out1"], results["g3"])
+        self.assertEqual(results["out2"], 1)
+
+        self.circuit.add_output("out3", "Bad", "missing")
+        with self.assertRaises(ValueError):
+            self.circuit.compute_circuit({"a": 1, "b": 0, "c": 0})
+
+    def test_missing_input_reported(self):
+        """测试门使用的输入缺失时报错"""
+        with self.assertRaises(ValueError) as ctx:
+            self.circuit.compute_circuit({"a": 1, "c": 0})
+        self.assertIn("b", str(ctx.exception))
+
+    def test_from_dict_missing_gate_field(self):
+        """测试门数据缺少字段时报错"""
+        data = {"circuit": {
+            "name": "bad",
+            "gates": [{"id": "g1", "type": "AND", "inputs": ["a"], "output": "g1"}],
+            "inputs": [],
+            "outputs": [],
+            "connections": []
+        }}
+        with self.assertRaises(ValueError) as ctx:
+            Circuit.from_dict(data)
+        self.assertIn("门数据缺少delay字段", str(ctx.exception))
+
+if __name__ == '__main__':
+    unittest.main()
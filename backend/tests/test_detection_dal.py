@@ -12,24 +12,35 @@ class TestConfig(Config):
 class TestDetectionDAL(unittest.TestCase):
     """测试检测结果数据访问层"""
     
-    def setUp(self):
-        self.app = create_app(TestConfig)
-        self.app_context = self.app.app_context()
-        self.app_context.push()
+    @classmethod
+    def setUpClass(cls):
+        # 所有测试共用一个应用和数据库，只建一次表
+        cls.app = create_app(TestConfig)
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
         db.create_all()
         
         # 创建测试电路
-        self.circuit = Circuit(
+        circuit = Circuit(
             name="test_circuit",
             expression="A AND B"
         )
-        db.session.add(self.circuit)
+        db.session.add(circuit)
         db.session.commit()
+        cls.circuit_id = circuit.id
     
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         db.session.remove()
         db.drop_all()
-        self.app_context.pop()
+        cls.app_context.pop()
+    
+    def setUp(self):
+        self.circuit = db.session.get(Circuit, self.circuit_id)
+    
+    def tearDown(self):
+        # DAL写入只flush不提交，回滚即可撤销本测试写入的结果
+        db.session.rollback()
     
     def test_add_race_condition(self):
         """测试添加竞争条件结果"""
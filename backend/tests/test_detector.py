@@ -1,5 +1,8 @@
+import random
 import unittest
-from app.models.circuit import Circuit, LogicGate
+from itertools import product
+from unittest import mock
+from app.models.circuit import Circuit, LogicGate, unpack_bits
 from app.services.detector import HazardDetector
 
 class TestHazardDetector(unittest.TestCase):
@@ -37,6 +40,53 @@ class TestHazardDetector(unittest.TestCase):
         self.assertEqual(rc["gate_id"], "g1")
         self.assertEqual(rc["gate_type"], "AND")
     
+    def test_close_delay_pairs(self):
+        """测试延迟相近的输入对与两两比较结果一致"""
+        delays = [0.4, 1.5, 0.0, 0.2, 1.2]
+        expected = [(i, j) for i in range(len(delays)) for j in range(i + 1, len(delays))
+                    if abs(delays[i] - delays[j]) < 0.5]
+        self.assertEqual(HazardDetector._close_delay_pairs(delays), expected)
+    
+    def test_input_ports_bound_by_source(self):
+        """测试连接顺序与端口顺序不同时按信号源绑定端口"""
+        self.circuit.add_gate(LogicGate("g2", "OR", 1.0, ["in1", "in2", "x"], "g2"))
+        self.circuit.add_connection("in2", "g2", 0.1)
+        self.circuit.add_connection("g1", "g2", 0.1)
+        self.circuit.add_connection("in1", "g2", 0.1)
+        
+        detector = HazardDetector(self.circuit)
+        self.assertEqual(detector._input_port_sources("g2"), {"in1": "in1", "in2": "in2", "x": "g1"})
+    
+    def test_paths_cache_bounded(self):
+        """测试路径缓存超过上限时淘汰最久未使用的门"""
+        self.circuit.add_gate(LogicGate("g2", "NOT", 1.0, ["g1"], "g2"))
+        self.circuit.add_connection("g1", "g2", 0.1)
+        detector = HazardDetector(self.circuit)
+        
+        with mock.patch("app.services.detector.PATHS_CACHE_SIZE", 1):
+            self.assertEqual(detector._find_all_paths_to_gate("g1"), (("in1", "g1"), ("in2", "g1")))
+            detector._find_all_paths_to_gate("g2")
+        self.assertEqual(list(detector.paths), ["g2"])
+    
+    def test_path_nodes_stop_at_outputs(self):
+        """测试路径节点只包含能到达输出的节点"""
+        self.circuit.add_gate(LogicGate("g2", "NOT", 1.0, ["in1"], "g2"))
+        self.circuit.add_gate(LogicGate("g3", "OR", 1.0, ["g1", "g2"], "g3"))
+        self.circuit.add_connection("in1", "g2", 0.1)
+        self.circuit.add_connection("g1", "g3", 0.1)
+        self.circuit.add_connection("g2", "g3", 0.1)
+        detector = HazardDetector(self.circuit)
+        
+        names = detector._compile_graph().node_names
+        mask = unpack_bits(detector._path_nodes(["g2"]), len(names))
+        self.assertEqual({names[i] for i in range(len(names)) if mask[i]}, set())
+        
+        self.circuit.add_output("out2", "Z", "g3")
+        detector = HazardDetector(self.circuit)
+        names = detector._compile_graph().node_names
+        mask = unpack_bits(detector._path_nodes(["g2"]), len(names))
+        self.assertEqual({names[i] for i in range(len(names)) if mask[i]}, {"g2", "g3"})
+    
     def test_static_hazard_detection(self):
         """测试静态冒险检测"""
         # 添加另一条路径以创建可能的冒险
@@ -82,4 +132,93 @@ class TestHazardDetector(unittest.TestCase):
         self.circuit.add_output("out3", "W", "g4")
         
         results = self.detector.detect_hazards()
-        self.assertGreater(len(results["hazards"]), 1) 
\ No newline at end of file
+        self.assertGreater(len(results["hazards"]), 1) 
+
+    def test_expression_hazard_in_convergence_cone(self):
+        """测试特殊变量分析只枚举汇合点扇入锥内的输入"""
+        # Y = (A·B + ~A·C)·D，A的原值和反值在g3汇合
+        circuit = Circuit("mux")
+        for input_id, name in [("a", "A"), ("b", "B"), ("c", "C"), ("d", "D")]:
+            circuit.add_input(input_id, name, 0)
+        circuit.add_gate(LogicGate("n1", "NOT", 1.0, ["a"], "n1"))
+        circuit.add_gate(LogicGate("g1", "AND", 1.0, ["a", "b"], "g1"))
+        circuit.add_gate(LogicGate("g2", "AND", 1.0, ["n1", "c"], "g2"))
+        circuit.add_gate(LogicGate("g3", "OR", 1.0, ["g1", "g2"], "g3"))
+        circuit.add_gate(LogicGate("g4", "AND", 1.0, ["g3", "d"], "g4"))
+        for from_id, to_id in [("a", "n1"), ("a", "g1"), ("b", "g1"), ("n1", "g2"),
+                               ("c", "g2"), ("g1", "g3"), ("g2", "g3"), ("g3", "g4"), ("d", "g4")]:
+            circuit.add_connection(from_id, to_id, 0.1)
+        circuit.add_output("out1", "Y", "g4")
+        
+        hazards = HazardDetector(circuit)._detect_hazards_by_expression()
+        
+        self.assertEqual(len(hazards), 1)
+        self.assertEqual(hazards[0]["other_inputs"], {"b": 1, "c": 1})
+        self.assertEqual(hazards[0]["hazard_type"], "静态冒险-1")
+        self.assertEqual(hazards[0]["hazard_gates"][0]["gate_id"], "g3")
+
+    def test_expression_hazard_through_indirect_negation(self):
+        """测试反相不直接接在输入上时也能按极性找到汇合点"""
+        # Y = A·B + ~(A·C)，A的反相经过g2后的NOT门得到
+        circuit = Circuit("indirect")
+        for input_id, name in [("a", "A"), ("b", "B"), ("c", "C")]:
+            circuit.add_input(input_id, name, 0)
+        circuit.add_gate(LogicGate("g1", "AND", 1.0, ["a", "b"], "g1"))
+        circuit.add_gate(LogicGate("g2", "AND", 1.0, ["a", "c"], "g2"))
+        circuit.add_gate(LogicGate("n1", "NOT", 1.0, ["g2"], "n1"))
+        circuit.add_gate(LogicGate("g3", "OR", 1.0, ["g1", "n1"], "g3"))
+        for from_id, to_id in [("a", "g1"), ("b", "g1"), ("a", "g2"), ("c", "g2"),
+                               ("g2", "n1"), ("g1", "g3"), ("n1", "g3")]:
+            circuit.add_connection(from_id, to_id, 0.1)
+        circuit.add_output("out1", "Y", "g3")
+        
+        hazards = HazardDetector(circuit)._detect_hazards_by_expression()
+        
+        self.assertEqual([h["other_inputs"] for h in hazards], [{"b": 1, "c": 1}])
+        self.assertEqual(hazards[0]["variable"], "A")
+
+    def test_bitwise_combinations_match_special_variable_analysis(self):
+        """测试按位并行筛选的组合与逐组合特殊变量分析一致"""
+        rng = random.Random(1)
+        for _ in range(20):
+            circuit = Circuit("random")
+            nets = []
+            for i in range(5):
+                circuit.add_input(f"i{i}", f"I{i}", 0)
+                nets.append(f"i{i}")
+            for g in range(12):
+                gate_type = rng.choice(["AND", "OR", "NOT", "NOT"])
+                inputs = [rng.choice(nets)] if gate_type == "NOT" else rng.sample(nets, 2)
+                circuit.add_gate(LogicGate(f"g{g}", gate_type, 1.0, inputs, f"g{g}"))
+                for input_id in inputs:
+                    circuit.add_connection(input_id, f"g{g}", 0.1)
+                nets.append(f"g{g}")
+            
+            detector = HazardDetector(circuit)
+            for var_id, data in circuit.inputs.items():
+                convergence_points = detector._find_convergence_gates(var_id)
+                if not convergence_points:
+                    continue
+                cone_inputs, cone_gates = detector._fanin_cone(convergence_points)
+                other_inputs = [inp for inp in cone_inputs if inp != var_id]
+                
+                mask = detector._find_hazard_combinations(
+                    var_id, other_inputs, cone_gates, set(convergence_points)
+                )
+                # 组合编号的第j位为第j个输入的取值，product的最后一位变化最快，因此逆序对应
+                expected = [
+                    detector._analyze_hazard_with_special_variable(
+                        var_id, data["name"], dict(zip(other_inputs, reversed(values))),
+                        cone_gates, set(convergence_points)
+                    ) is not None
+                    for values in product((0, 1), repeat=len(other_inputs))
+                ]
+                self.assertEqual(mask.tolist(), expected)
+
+    def test_detector_reused_until_circuit_changes(self):
+        """测试同一电路复用检测器，结构变化后重新创建"""
+        detector = HazardDetector.for_circuit(self.circuit)
+        self.assertIs(HazardDetector.for_circuit(self.circuit), detector)
+        
+        self.circuit.add_gate(LogicGate("g2", "NOT", 1.0, ["in1"], "g2"))
+        self.assertIsNot(HazardDetector.for_circuit(self.circuit), detector)
@@ -59,4 +59,19 @@ class TestCircuitParser(unittest.TestCase):
         """测试嵌套表达式"""
         circuit = self.parser.parse_expression("((A AND B) OR C) AND (NOT D)")
         self.assertEqual(len(circuit.inputs), 4)
-        self.assertGreaterEqual(len(circuit.gates), 4) 
\ No newline at end of file
+        self.assertGreaterEqual(len(circuit.gates), 4)
+    
+    def test_inputs_with_digits(self):
+        """测试包含数字和下划线的变量名作为输入"""
+        circuit = self.parser.parse("A1 AND NOT B_2")
+        self.assertEqual(list(circuit.inputs), ['a1', 'b_2'])
+        self.assertEqual(circuit.compute_circuit({'a1': 1, 'b_2': 0})['out1'], 1)
+    
+    def test_parse_cached_by_expression(self):
+        """测试相同表达式复用解析结果"""
+        first = self.parser.parse("A OR NOT B")
+        self.assertIs(CircuitParser().parse("A OR NOT B"), first)
+        
+        # 同一个解析器解析新表达式时门编号重新从g1开始
+        circuit = self.parser.parse("C AND D")
+        self.assertEqual(list(circuit.gates), ['g1'])